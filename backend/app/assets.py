@@ -0,0 +1,103 @@
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from .responses import Resource, make_resource
+from .shell import encode_variants, variant_response
+
+STATIC_PREFIX = "/static/"
+# Хешированный URL меняется вместе с содержимым, поэтому кэшируется навсегда
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Старый URL без хеша перепроверяется через ETag
+ASSET_CACHE_CONTROL = "no-cache"
+
+# Отдаются только файлы с этими расширениями; исходники (src/*.tsx, *.ts), README и
+# прочее в каталоге frontend наружу не попадают
+PUBLIC_EXTENSIONS = {".css", ".js", ".mjs", ".svg", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".ico", ".woff", ".woff2"}
+# Каталоги с исходниками, которые не публикуются целиком
+PRIVATE_DIRS = {"src", "node_modules"}
+# Текстовые форматы сжимаются заранее; картинки и шрифты уже сжаты
+COMPRESSIBLE_EXTENSIONS = {".css", ".js", ".mjs", ".svg"}
+
+
+class Asset(NamedTuple):
+    """Статический файл: хешированный путь, тип и варианты тела по сжатию"""
+    path: str
+    hashed_path: str
+    media_type: str
+    variants: Dict[Optional[str], Resource]
+
+
+def _hashed_name(path: str, raw: bytes) -> str:
+    """styles.css -> styles.1a2b3c4d.css"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.blake2b(raw, digest_size=4).hexdigest()}{ext}"
+
+
+def _load_asset(directory: str, path: str) -> Asset:
+    with open(os.path.join(directory, path), "rb") as f:
+        raw = f.read()
+    ext = os.path.splitext(path)[1].lower()
+    if ext in COMPRESSIBLE_EXTENSIONS:
+        # Сжатый вариант оставляем, только если он действительно меньше
+        variants = {name: resource for name, resource in encode_variants(raw).items()
+                    if name is None or len(resource.body) < len(raw)}
+    else:
+        variants = {None: make_resource(raw)}
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return Asset(path, _hashed_name(path, raw), media_type, variants)
+
+
+class StaticAssets:
+    """Публичные файлы frontend в памяти, заранее сжатые, по обычным и хешированным URL.
+
+    Каталог читается один раз при первом обращении; после изменения файлов нужен перезапуск.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._assets: Optional[Dict[str, Asset]] = None
+        self._by_url: Dict[str, Asset] = {}
+
+    def _load(self) -> Dict[str, Asset]:
+        if self._assets is None:
+            with self._lock:
+                if self._assets is None:
+                    assets = {}
+                    for root, dirs, files in os.walk(self.directory):
+                        dirs[:] = sorted(d for d in dirs if d not in PRIVATE_DIRS and not d.startswith("."))
+                        for name in sorted(files):
+                            if name.startswith(".") or os.path.splitext(name)[1].lower() not in PUBLIC_EXTENSIONS:
+                                continue
+                            path = os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, "/")
+                            assets[path] = _load_asset(self.directory, path)
+                    self._by_url = {**{a.path: a for a in assets.values()}, **{a.hashed_path: a for a in assets.values()}}
+                    self._assets = assets
+        return self._assets
+
+    def __len__(self) -> int:
+        return len(self._load())
+
+    def url(self, path: str) -> str:
+        """Хешированный URL файла (или обычный, если такого файла нет)"""
+        asset = self._load().get(path)
+        return STATIC_PREFIX + (asset.hashed_path if asset else path)
+
+    def rewrite(self, html: bytes) -> bytes:
+        """Замена ссылок /static/<файл> в HTML на хешированные"""
+        for path, asset in self._load().items():
+            html = html.replace(f'"{STATIC_PREFIX}{path}"'.encode(), f'"{STATIC_PREFIX}{asset.hashed_path}"'.encode())
+        return html
+
+    def response(self, request: Request, path: str) -> Optional[Response]:
+        """Ответ для /static/<path>; None, если такого публичного файла нет"""
+        self._load()
+        asset = self._by_url.get(path)
+        if asset is None:
+            return None
+        cache_control = IMMUTABLE_CACHE_CONTROL if path == asset.hashed_path else ASSET_CACHE_CONTROL
+        return variant_response(request, asset.variants, asset.media_type, cache_control)
@@ -0,0 +1,20 @@
+from typing import AsyncIterator, Iterable
+from .responses import dumps
+from .store import ScheduleStore
+
+# Ограничение на число явно перечисленных групп в одном пакетном запросе
+MAX_BATCH_GROUPS = 200
+
+
+async def iter_schedule_lines(store: ScheduleStore, group_ids: Iterable[str]) -> AsyncIterator[bytes]:
+    """Строки NDJSON из готовых тел хранилища, без повторной сериализации расписаний"""
+    seen = set()
+    for group_id in group_ids:
+        if group_id in seen:
+            continue
+        seen.add(group_id)
+        resource = store.get_schedule(group_id)
+        if resource is None:
+            yield b'{"id":' + dumps(group_id) + b',"error":"not_found"}\n'
+        else:
+            yield b'{"id":' + dumps(group_id) + b',"schedule":' + resource.body + b"}\n"
@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from .compact import FIELDS, CompactSchedules, Lesson
+from .lookup import DAYS
+from .responses import Resource, dumps, make_resource
+from .store import ScheduleStore
+
+# Сколько последних подмен данных помнит журнал изменений
+CHANGELOG_VERSIONS = int(os.environ.get("SCHEDULE_CHANGELOG_VERSIONS", "32"))
+
+# Слот занятия: день, четность и границы дат, время
+_SlotKey = Tuple[int, int, int, int, str]
+
+
+def _lesson_key(compact: CompactSchedules, lesson: Lesson) -> Tuple:
+    tables = compact.tables
+    return (lesson.day, lesson.parity, lesson.date_from, lesson.date_to) + tuple(
+        tables[field].strings[getattr(lesson, field)] for field in FIELDS
+    )
+
+
+def _lesson_json(compact: CompactSchedules, lesson: Lesson) -> Dict[str, str]:
+    return {"day": DAYS[lesson.day], **compact.lesson_dict(lesson)}
+
+
+def parse_token(token: str) -> Optional[Tuple[str, int]]:
+    """Разбор версии «эпоха.номер» (ScheduleStore.token); None, если она некорректна"""
+    epoch, _, number = token.rpartition(".")
+    if not epoch or not number.isdigit():
+        return None
+    return epoch, int(number)
+
+
+def diff_group(old: CompactSchedules, new: CompactSchedules, group_id: str) -> Dict[str, List[Dict]]:
+    """Изменения занятий группы: added, removed и changed (в том же слоте поменялись поля)"""
+    old_lessons = {_lesson_key(old, lesson): lesson for lesson in old.lessons(group_id)} if group_id in old else {}
+    new_lessons = {_lesson_key(new, lesson): lesson for lesson in new.lessons(group_id)} if group_id in new else {}
+    removed = [key for key in old_lessons if key not in new_lessons]
+    added = [key for key in new_lessons if key not in old_lessons]
+
+    # Одно занятие убрано и одно добавлено в том же слоте - это правка, а не замена
+    def slots(keys) -> Dict[_SlotKey, List[Tuple]]:
+        result: Dict[_SlotKey, List[Tuple]] = {}
+        for key in keys:
+            result.setdefault(key[:5], []).append(key)
+        return result
+
+    removed_slots, added_slots = slots(removed), slots(added)
+    changed = []
+    for slot, old_keys in removed_slots.items():
+        new_keys = added_slots.get(slot)
+        if len(old_keys) == 1 and new_keys and len(new_keys) == 1:
+            old_key, new_key = old_keys[0], new_keys[0]
+            lesson = _lesson_json(new, new_lessons[new_key])
+            before = _lesson_json(old, old_lessons[old_key])
+            # Поля слота остаются, из остальных - только изменившиеся
+            fields = {name: value for name, value in lesson.items() if name not in FIELDS[1:] or before.get(name) != value}
+            fields["was"] = {name: before[name] for name in FIELDS[1:] if before[name] != lesson[name]}
+            changed.append(fields)
+            removed.remove(old_key)
+            added.remove(new_key)
+
+    delta = {}
+    if added:
+        delta["added"] = [_lesson_json(new, new_lessons[key]) for key in added]
+    if removed:
+        delta["removed"] = [_lesson_json(old, old_lessons[key]) for key in removed]
+    if changed:
+        delta["changed"] = changed
+    return delta
+
+
+class ChangeLog:
+    """Журнал изменений по группам за последние max_versions подмен данных.
+
+    Разница считается один раз при подмене; в журнале лежат уже сериализованные
+    изменения. None вместо изменений значит, что проще отдать расписание целиком.
+    """
+
+    def __init__(self, max_versions: int = CHANGELOG_VERSIONS):
+        self.max_versions = max_versions
+        self._lock = threading.Lock()
+        # Версия, начиная с которой журнал полон: с нее можно получить все изменения
+        self.base: Optional[int] = None
+        self.epoch: Optional[str] = None
+        self.version: Optional[int] = None
+        self._swaps: Deque[Tuple[int, List[str]]] = deque()
+        self._groups: Dict[str, Deque[Tuple[int, Optional[bytes]]]] = {}
+
+    def record(self, old: ScheduleStore, new: ScheduleStore) -> Dict[str, Optional[bytes]]:
+        """Изменения при подмене old -> new: сериализованная разница по каждой изменившейся группе"""
+        entries: Dict[str, Optional[bytes]] = {}
+        for group_id in set(old.compact.group_ids()) | set(new.compact.group_ids()):
+            before, after = old.get_schedule(group_id), new.get_schedule(group_id)
+            if before is not None and after is not None and before.etag == after.etag:
+                continue
+            if before is None or after is None:
+                entries[group_id] = None
+                continue
+            encoded = dumps({"version": new.token, **diff_group(old.compact, new.compact, group_id)})
+            entries[group_id] = encoded if len(encoded) < len(after.body) else None
+
+        with self._lock:
+            if (self.epoch, self.version) != (old.epoch, old.version) or old.epoch != new.epoch:
+                # Пропущенные подмены, первая запись или новая эпоха: журнал начинается заново.
+                # Со сменой эпохи старые номера ничего не значат, журнал полон только с новой версии
+                self._swaps.clear()
+                self._groups = {}
+                self.base = old.version if old.epoch == new.epoch else new.version
+            for group_id, encoded in entries.items():
+                self._groups.setdefault(group_id, deque()).append((new.version, encoded))
+            self._swaps.append((new.version, list(entries)))
+            self.epoch = new.epoch
+            self.version = new.version
+            while len(self._swaps) > self.max_versions:
+                dropped, group_ids = self._swaps.popleft()
+                self.base = dropped
+                for group_id in group_ids:
+                    entries_for_group = self._groups[group_id]
+                    entries_for_group.popleft()
+                    if not entries_for_group:
+                        del self._groups[group_id]
+        return entries
+
+    def since(self, store: ScheduleStore, group_id: str, token: str) -> Resource:
+        """Изменения группы после версии token или все расписание, если журнал их не покрывает.
+
+        Версия другой эпохи (другой обходчик или снимок) тоже дает все расписание.
+        """
+        parsed = parse_token(token)
+        with self._lock:
+            covered = parsed is not None and parsed[0] == store.epoch and (
+                parsed[1] == store.version
+                or (self.epoch == store.epoch and self.base is not None and self.base <= parsed[1] < store.version)
+            )
+            # Журнал может опережать хранилище: изменения пишутся до подмены
+            entries = [
+                encoded
+                for entry_version, encoded in self._groups.get(group_id, ())
+                if parsed[1] < entry_version <= store.version
+            ] if covered and self.epoch == store.epoch else []
+        version = b'{"version":' + dumps(store.token)
+        if covered and all(encoded is not None for encoded in entries):
+            return make_resource(version + b',"since":' + dumps(token) + b',"changes":[' + b",".join(entries) + b"]}")
+        schedule = store.get_schedule(group_id).body
+        return make_resource(version + b',"full":true,"schedule":' + schedule + b"}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "versions": len(self._swaps),
+                "groups": len(self._groups),
+                "entries": sum(len(entries) for entries in self._groups.values()),
+                "bytes": sum(len(encoded or b"") for entries in self._groups.values() for _, encoded in entries),
+            }
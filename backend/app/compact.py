@@ -0,0 +1,168 @@
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from .lookup import DAYS
+
+# Строковые поля занятия; в записи хранятся их номера в таблицах строк
+FIELDS = ("time", "name", "teacher", "room")
+# Числовые поля перед строковыми: день недели, четность недели и границы дат
+RECORD_SIZE = 4 + len(FIELDS)
+
+# Четность недели: 0 - каждую неделю
+PARITIES = (None, "odd", "even")
+
+
+class StringTable:
+    """Интернированные строки: каждая хранится один раз и адресуется номером"""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self, strings: Iterable[str] = ()):
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for value in strings:
+            self.intern(value)
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def intern(self, value: str) -> int:
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self._ids[value] = string_id
+        return string_id
+
+
+def _date_to_int(value: Optional[str]) -> int:
+    return date.fromisoformat(value).toordinal() if value else 0
+
+
+class Lesson:
+    """Занятие как набор небольших чисел; строки берутся из таблиц при выдаче.
+
+    date_from/date_to - порядковые номера дней (date.toordinal()), 0 - без ограничения.
+    """
+
+    __slots__ = ("day", "parity", "date_from", "date_to", "time", "name", "teacher", "room")
+
+    def __init__(
+        self,
+        day: int,
+        parity: int,
+        date_from: int,
+        date_to: int,
+        time: int,
+        name: int,
+        teacher: int,
+        room: int,
+    ):
+        self.day = day
+        self.parity = parity
+        self.date_from = date_from
+        self.date_to = date_to
+        self.time = time
+        self.name = name
+        self.teacher = teacher
+        self.room = room
+
+    def occurs_on(self, day: date, week_parity: str) -> bool:
+        """Проходит ли занятие в указанную дату (день недели, четность и границы дат)"""
+        if day.weekday() != self.day:
+            return False
+        if self.parity and PARITIES[self.parity] != week_parity:
+            return False
+        ordinal = day.toordinal()
+        if self.date_from and ordinal < self.date_from:
+            return False
+        if self.date_to and ordinal > self.date_to:
+            return False
+        return True
+
+
+class CompactSchedules:
+    """Расписания всех групп в одном массиве записей по RECORD_SIZE чисел.
+
+    Каждая запись - (день, четность, дата с, дата по, время, предмет, преподаватель,
+    аудитория), где день - индекс в DAYS, четность - индекс в PARITIES, даты - номера
+    дней, остальное - номера в таблицах строк. Для группы хранится только диапазон
+    записей в общем массиве. Форма JSON восстанавливается в expand().
+    """
+
+    __slots__ = ("tables", "records", "_ranges")
+
+    def __init__(self):
+        self.tables: Dict[str, StringTable] = {field: StringTable() for field in FIELDS}
+        # 'I': номера строк могут превысить 65535 при обходе всего сайта
+        self.records = array("I")
+        self._ranges: Dict[str, Tuple[int, int]] = {}
+
+    @classmethod
+    def from_schedules(cls, schedules: Iterable[Tuple[str, Dict[str, List[Dict[str, str]]]]]) -> "CompactSchedules":
+        compact = cls()
+        for group_id, schedule in schedules:
+            compact.add(group_id, schedule)
+        return compact
+
+    @classmethod
+    def from_parts(cls, tables: Dict[str, List[str]], records: Union[array, memoryview], ranges: Dict[str, List[int]]) -> "CompactSchedules":
+        """Восстановление из сохраненных таблиц и массива (см. snapshot); memoryview - только для чтения"""
+        compact = cls()
+        compact.tables = {field: StringTable(tables[field]) for field in FIELDS}
+        compact.records = records
+        compact._ranges = {group_id: (start, end) for group_id, (start, end) in ranges.items()}
+        return compact
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._ranges
+
+    def group_ids(self) -> List[str]:
+        return list(self._ranges)
+
+    @property
+    def ranges(self) -> Dict[str, Tuple[int, int]]:
+        return self._ranges
+
+    def add(self, group_id: str, schedule: Dict[str, List[Dict[str, str]]]) -> None:
+        start = len(self.records)
+        for day_index, day in enumerate(DAYS):
+            for lesson in schedule.get(day) or []:
+                self.records.append(day_index)
+                self.records.append(PARITIES.index(lesson.get("week")))
+                self.records.append(_date_to_int(lesson.get("date_from")))
+                self.records.append(_date_to_int(lesson.get("date_to")))
+                for field in FIELDS:
+                    self.records.append(self.tables[field].intern(lesson[field]))
+        self._ranges[group_id] = (start, len(self.records))
+
+    def lessons(self, group_id: str) -> Iterator[Lesson]:
+        start, end = self._ranges[group_id]
+        records = self.records
+        for offset in range(start, end, RECORD_SIZE):
+            yield Lesson(*records[offset:offset + RECORD_SIZE])
+
+    def lesson_dict(self, lesson: Lesson) -> Dict[str, str]:
+        """Занятие в форме JSON; необязательные поля появляются, только если заданы"""
+        result = {field: self.tables[field].strings[getattr(lesson, field)] for field in FIELDS}
+        if lesson.parity:
+            result["week"] = PARITIES[lesson.parity]
+        if lesson.date_from:
+            result["date_from"] = date.fromordinal(lesson.date_from).isoformat()
+        if lesson.date_to:
+            result["date_to"] = date.fromordinal(lesson.date_to).isoformat()
+        return result
+
+    def expand(self, group_id: str) -> Dict[str, List[Dict[str, str]]]:
+        """Расписание группы в форме ответа API"""
+        schedule = {day: [] for day in DAYS}
+        for lesson in self.lessons(group_id):
+            schedule[DAYS[lesson.day]].append(self.lesson_dict(lesson))
+        return schedule
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, List[Dict[str, str]]]]]:
+        for group_id in self._ranges:
+            yield group_id, self.expand(group_id)
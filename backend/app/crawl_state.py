@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+from typing import Dict, Mapping, Optional
+
+
+class CrawlState:
+    """Валидаторы страниц между обходами: ETag, Last-Modified и хэш тела по URL.
+
+    Новые значения сначала накапливаются в pending и попадают в entries только
+    после commit(), чтобы прерванный обход не пометил страницы как уже обработанные.
+
+    epoch - эпоха хранилища, собранного вместе с этими валидаторами: «не изменилось»
+    верно только относительно тех данных, а не любых других.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict[str, str]]] = None, epoch: Optional[str] = None):
+        self.entries: Dict[str, Dict[str, str]] = entries or {}
+        self.pending: Dict[str, Dict[str, str]] = {}
+        self.epoch = epoch
+
+    @classmethod
+    def load(cls, path: str) -> "CrawlState":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if "entries" not in data:
+            # Старый формат без эпохи: такие валидаторы не привязаны ни к каким данным
+            return cls(data)
+        return cls(data["entries"], data.get("epoch"))
+
+    def save(self, path: str) -> None:
+        """Атомарная запись: временный файл и os.replace"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"epoch": self.epoch, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        """Заголовки условного GET для известного URL"""
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, body: bytes, headers: Mapping[str, str]) -> bool:
+        """Запоминает ответ; False, если тело совпадает с прошлым обходом"""
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {"sha256": digest}
+        if headers.get("ETag"):
+            entry["etag"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            entry["last_modified"] = headers["Last-Modified"]
+        self.pending[url] = entry
+        return self.entries.get(url, {}).get("sha256") != digest
+
+    def commit(self) -> None:
+        self.entries.update(self.pending)
+        self.pending = {}
@@ -0,0 +1,101 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional
+from .parser import FetchError, MAIParser
+
+# Курсы, которые обходятся у каждого института
+COURSES = (1, 2, 3, 4)
+
+
+class CrawlResult:
+    """Результат обхода: институты, группы по курсам, расписания и статистика"""
+
+    def __init__(self):
+        self.institutes: List[Dict[str, str]] = []
+        self.groups: Dict[str, Dict[str, List[Dict]]] = {}
+        self.schedules: Dict[str, Dict] = {}
+        # При инкрементальном обходе: группы, чьи страницы не изменились
+        self.unchanged: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.stats: Dict = {}
+
+
+def course_groups(groups: List[Dict[str, str]], course: str) -> List[Dict]:
+    """Группы курса в том виде, в каком они лежат в хранилище"""
+    return [{"id": group["id"], "name": group["name"], "course": int(course)} for group in groups]
+
+
+def _failure_kind(error: Exception) -> str:
+    if isinstance(error, FetchError):
+        return error.kind
+    return type(error).__name__
+
+
+async def _gather_phase(coros, phase_timeout: Optional[float]):
+    """Этап обхода: все запросы параллельно, ошибки возвращаются как значения"""
+    return await asyncio.wait_for(
+        asyncio.gather(*coros, return_exceptions=True),
+        timeout=phase_timeout,
+    )
+
+
+async def _crawl(
+    parser: MAIParser,
+    courses: Iterable[int],
+    phase_timeout: Optional[float],
+    incremental: bool,
+) -> CrawlResult:
+    result = CrawlResult()
+    result.institutes = await asyncio.wait_for(parser.get_institutes(), timeout=phase_timeout)
+
+    # Институты → курсы → группы
+    tasks = [
+        (institute["id"], str(course))
+        for institute in result.institutes
+        for course in courses
+    ]
+    group_lists = await _gather_phase(
+        [parser.get_groups(institute_id, int(course)) for institute_id, course in tasks],
+        phase_timeout,
+    )
+    for (institute_id, course), groups in zip(tasks, group_lists):
+        if isinstance(groups, Exception):
+            result.failed[f"groups:{institute_id}:{course}"] = _failure_kind(groups)
+            continue
+        if groups:
+            result.groups.setdefault(institute_id, {})[course] = course_groups(groups, course)
+
+    # Группы → расписания
+    group_ids = [
+        group["id"]
+        for courses_groups in result.groups.values()
+        for groups in courses_groups.values()
+        for group in groups
+    ]
+    fetch_schedule = parser.get_schedule_if_changed if incremental else parser.get_schedule
+    schedules = await _gather_phase([fetch_schedule(group_id) for group_id in group_ids], phase_timeout)
+    for group_id, schedule in zip(group_ids, schedules):
+        if isinstance(schedule, Exception):
+            result.failed[group_id] = _failure_kind(schedule)
+        elif schedule is None:
+            result.unchanged.append(group_id)
+        else:
+            result.schedules[group_id] = schedule
+    return result
+
+
+async def crawl(
+    parser: MAIParser,
+    courses: Iterable[int] = COURSES,
+    phase_timeout: Optional[float] = 300.0,
+    total_timeout: Optional[float] = 900.0,
+    incremental: bool = False,
+) -> CrawlResult:
+    """Полный обход сайта через открытый MAIParser.
+
+    incremental=True требует parser.state: расписания запрашиваются условно, и в
+    result.schedules попадают только изменившиеся группы. Валидаторы новых ответов
+    остаются в parser.state.pending, пока вызывающий код не сделает commit().
+    """
+    result = await asyncio.wait_for(_crawl(parser, courses, phase_timeout, incremental), timeout=total_timeout)
+    result.stats = parser.stats.as_dict()
+    return result
@@ -0,0 +1,56 @@
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Optional
+
+
+class GroupRecord(NamedTuple):
+    """Где находится группа: институт, курс и исходная запись"""
+    institute_id: str
+    course: str
+    group: Dict
+
+
+class GroupIndex:
+    """Индекс групп, построенный один раз из дерева институт → курс → группы"""
+
+    __slots__ = ("institutes", "tree", "_institute_names", "_by_id", "_by_institute")
+
+    def __init__(self, institutes: List[Dict[str, str]], groups: Dict[str, Dict[str, List[Dict]]]):
+        self.institutes = institutes
+        self.tree = groups
+        self._institute_names = {institute["id"]: institute["name"] for institute in institutes}
+        by_id = {}
+        by_institute = {}
+        for institute_id, courses in groups.items():
+            flat = []
+            for course, course_groups in courses.items():
+                for group in course_groups:
+                    by_id[group["id"]] = GroupRecord(institute_id, course, group)
+                flat.extend(course_groups)
+            by_institute[institute_id] = flat
+        self._by_id = MappingProxyType(by_id)
+        self._by_institute = MappingProxyType(by_institute)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._by_id
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def get(self, group_id: str) -> Optional[GroupRecord]:
+        return self._by_id.get(group_id)
+
+    def has_institute(self, institute_id: str) -> bool:
+        return institute_id in self.tree
+
+    def institute_name(self, institute_id: str) -> str:
+        return self._institute_names.get(institute_id, institute_id)
+
+    def institute_groups(self, institute_id: str) -> List[Dict]:
+        """Все группы института одним списком"""
+        return self._by_institute.get(institute_id, [])
+
+    def courses(self, institute_id: str) -> Mapping[str, List[Dict]]:
+        return self.tree.get(institute_id, {})
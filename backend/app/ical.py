@@ -0,0 +1,219 @@
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from .compact import Lesson
+from .lookup import normalize_key
+from .responses import etag_matches
+from .store import ScheduleStore
+from .weeks import TIMEZONE, semester_start, today, week_parity
+
+# Длина семестра в неделях: на столько вперед разворачиваются занятия
+SEMESTER_WEEKS = int(os.environ.get("SEMESTER_WEEKS", "18"))
+# Ограничение на суммарный размер готовых календарей в кэше
+ICAL_CACHE_BYTES = 16 * 1024 * 1024
+# Календари опрашиваются раз в 15-60 минут; чаще перепроверять незачем
+ICAL_CACHE_CONTROL = "public, max-age=900"
+# Примерный размер куска при потоковой отдаче
+CHUNK_SIZE = 16 * 1024
+
+_TIME_RANGE_RE = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})")
+
+
+class Feed(NamedTuple):
+    """Готовый календарь: куски тела, ETag и время последнего изменения"""
+    chunks: Tuple[bytes, ...]
+    size: int
+    etag: str
+    last_modified: datetime
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _line(name: str, value: str) -> bytes:
+    """Строка iCalendar с переносом по 75 байт (RFC 5545, 3.1)"""
+    raw = f"{name}:{value}".encode("utf-8")
+    if len(raw) <= 75:
+        return raw + b"\r\n"
+    parts = []
+    limit = 75
+    while raw:
+        cut = min(limit, len(raw))
+        # Не разрезаем многобайтовый символ UTF-8
+        while cut < len(raw) and raw[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(raw[:cut])
+        raw = raw[cut:]
+        limit = 74
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _utc(day: date, hour: str, minute: str) -> str:
+    """Время занятия (по Москве) в UTC: без VTIMEZONE клиенты не обязаны знать TZID"""
+    local = datetime(day.year, day.month, day.day, int(hour), int(minute), tzinfo=TIMEZONE)
+    return f"{local.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def semester_dates(reference: date) -> List[date]:
+    start = semester_start(reference)
+    return [start + timedelta(days=offset) for offset in range(SEMESTER_WEEKS * 7)]
+
+
+def _events(
+    store: ScheduleStore,
+    lessons: Iterable[Tuple[str, int, Lesson]],
+    dates: List[date],
+    stamp: str,
+) -> Iterator[bytes]:
+    tables = store.compact.tables
+    parities = {day: week_parity(day) for day in dates}
+    for group_id, number, lesson in lessons:
+        match = _TIME_RANGE_RE.match(tables["time"].strings[lesson.time])
+        if match is None:
+            continue
+        name = tables["name"].strings[lesson.name]
+        teacher = tables["teacher"].strings[lesson.teacher]
+        room = tables["room"].strings[lesson.room]
+        for day in dates:
+            if not lesson.occurs_on(day, parities[day]):
+                continue
+            yield b"".join((
+                b"BEGIN:VEVENT\r\n",
+                _line("UID", f"{group_id}-{number}-{day:%Y%m%d}@mai-schedule"),
+                _line("DTSTAMP", stamp),
+                _line("DTSTART", _utc(day, match.group(1), match.group(2))),
+                _line("DTEND", _utc(day, match.group(3), match.group(4))),
+                _line("SUMMARY", _escape(name)),
+                _line("LOCATION", _escape(room)),
+                _line("DESCRIPTION", _escape(f"{teacher}, группа {group_id}")),
+                b"END:VEVENT\r\n",
+            ))
+
+
+def _calendar(title: str, events: Iterable[bytes]) -> Iterator[bytes]:
+    """Календарь кусками примерно по CHUNK_SIZE, а не одной строкой"""
+    buffer = [
+        b"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//MAI Schedule//RU\r\nCALSCALE:GREGORIAN\r\n",
+        _line("X-WR-CALNAME", _escape(title)),
+        _line("X-WR-TIMEZONE", TIMEZONE.key),
+    ]
+    size = sum(map(len, buffer))
+    for event in events:
+        buffer.append(event)
+        size += len(event)
+        if size >= CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    buffer.append(b"END:VCALENDAR\r\n")
+    yield b"".join(buffer)
+
+
+class IcalFeeds:
+    """Календари групп и преподавателей, собранные один раз на версию данных и семестр.
+
+    Готовые байты хранятся в LRU, ограниченном суммарным размером, как в RenderCache.
+    """
+
+    def __init__(self, max_bytes: int = ICAL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Feed]" = OrderedDict()
+
+    @staticmethod
+    def _modified(store: ScheduleStore) -> datetime:
+        # Время сборки данных из снимка, а не часы процесса: у всех воркеров одинаковые ETag
+        return datetime.fromtimestamp(store.built_at, timezone.utc)
+
+    def _cached(self, key: Hashable) -> Optional[Feed]:
+        feed = self._entries.get(key)
+        if feed is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return feed
+
+    def _build(self, key: Hashable, store: ScheduleStore, title: str, lessons: Iterable[Tuple[str, int, Lesson]]) -> Feed:
+        feed = self._cached(key)
+        if feed is not None:
+            return feed
+
+        self.misses += 1
+        modified = self._modified(store)
+        dates = semester_dates(today())
+        digest = hashlib.blake2b(digest_size=12)
+        chunks = []
+        for chunk in _calendar(title, _events(store, lessons, dates, f"{modified:%Y%m%dT%H%M%SZ}")):
+            digest.update(chunk)
+            chunks.append(chunk)
+        feed = Feed(tuple(chunks), sum(map(len, chunks)), f'"{digest.hexdigest()}"', modified)
+        if feed.size <= self.max_bytes:
+            self._entries[key] = feed
+            self.size += feed.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+        return feed
+
+    def group(self, store: ScheduleStore, group_id: str) -> Feed:
+        compact = store.compact
+        key = ("group", group_id, store.epoch, store.version, semester_start(today()))
+        lessons = ((group_id, number, lesson) for number, lesson in enumerate(compact.lessons(group_id)))
+        return self._build(key, store, f"Расписание {group_id}", lessons)
+
+    def teacher(self, store: ScheduleStore, name: str) -> Optional[Feed]:
+        """Календарь преподавателя по всем группам; None, если такого нет"""
+        teacher_key = normalize_key(name)
+        key = ("teacher", teacher_key, store.epoch, store.version, semester_start(today()))
+        # Сначала кэш: поиск по всем строкам преподавателей нужен только для сборки
+        feed = self._cached(key)
+        if feed is not None:
+            return feed
+        strings = store.compact.tables["teacher"].strings
+        ids = {string_id for string_id, value in enumerate(strings) if normalize_key(value) == teacher_key}
+        if not ids:
+            return None
+        compact = store.compact
+        lessons = (
+            (group_id, number, lesson)
+            for group_id in compact.group_ids()
+            for number, lesson in enumerate(compact.lessons(group_id))
+            if lesson.teacher in ids
+        )
+        return self._build(key, store, f"Занятия {strings[min(ids)]}", lessons)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+def _not_modified_since(request: Request, feed: Feed) -> bool:
+    value = request.headers.get("if-modified-since")
+    if not value or request.headers.get("if-none-match"):
+        return False
+    try:
+        since = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return feed.last_modified <= since
+
+
+def feed_response(request: Request, feed: Feed) -> Response:
+    """Календарь потоком из готовых кусков; 304 по If-None-Match или If-Modified-Since"""
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": format_datetime(feed.last_modified, usegmt=True),
+        "Cache-Control": ICAL_CACHE_CONTROL,
+    }
+    if etag_matches(request.headers.get("if-none-match"), feed.etag) or _not_modified_since(request, feed):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Length"] = str(feed.size)
+    return StreamingResponse(iter(feed.chunks), media_type="text/calendar", headers=headers)
@@ -0,0 +1,48 @@
+import os
+from typing import Optional
+from .responses import Resource, dumps, make_resource
+from .singleflight import StaleWhileRevalidate
+
+# Срок свежести расписания, загруженного с сайта по запросу (секунды);
+# без него /api/schedule отдает только данные хранилища
+LIVE_TTL = float(os.environ["SCHEDULE_LIVE_TTL"]) if os.environ.get("SCHEDULE_LIVE_TTL") else None
+
+
+class LiveSchedules:
+    """Расписания прямо с сайта по запросу: single-flight и stale-while-revalidate.
+
+    Данные хранилища служат начальным устаревшим значением, поэтому первый же
+    запрос отвечает сразу, а загрузка с сайта идет в фоне.
+    """
+
+    def __init__(self, source_url: str, ttl: float):
+        self.source_url = source_url
+        self.cache: StaleWhileRevalidate[Resource] = StaleWhileRevalidate(ttl)
+        self._parser = None
+
+    @property
+    def stats(self):
+        """Счетчики загрузок с сайта (FetchStats) или None до запуска"""
+        return self._parser.stats if self._parser is not None else None
+
+    async def start(self) -> None:
+        from .parser import MAIParser
+
+        self._parser = MAIParser(base_url=self.source_url)
+        await self._parser.__aenter__()
+
+    async def stop(self) -> None:
+        if self._parser is not None:
+            await self._parser.__aexit__(None, None, None)
+            self._parser = None
+
+    async def _fetch(self, group_id: str) -> Resource:
+        schedule = await self._parser.get_schedule(group_id)
+        if "error" in schedule:
+            raise LookupError(schedule["error"])
+        return make_resource(dumps(schedule))
+
+    async def get(self, group_id: str, fallback: Optional[Resource]) -> Resource:
+        if fallback is not None:
+            self.cache.seed(group_id, fallback)
+        return await self.cache.get(group_id, lambda: self._fetch(group_id))
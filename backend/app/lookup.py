@@ -0,0 +1,92 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from .responses import Resource, dumps, make_resource
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+# Четность учебной недели (см. weeks.week_parity)
+WEEK_PARITIES = ("odd", "even")
+
+_START_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+
+
+def normalize_key(value: str) -> str:
+    """Ключ поиска: регистр и лишние пробелы не важны"""
+    return " ".join(value.split()).casefold()
+
+
+def _start_minutes(time_range: str) -> int:
+    match = _START_TIME_RE.match(time_range)
+    return int(match.group(1)) * 60 + int(match.group(2)) if match else 0
+
+
+class ReverseIndex:
+    """Обратные индексы по расписаниям: преподаватель, аудитория и предмет.
+
+    Все ответы сериализуются при построении, поэтому запрос - это поиск в словаре.
+    """
+
+    __slots__ = ("times", "_teachers", "_rooms", "_subjects", "_free_rooms")
+
+    def __init__(self, schedules: Iterable[Tuple[str, Dict[str, List[Dict[str, str]]]]]):
+        teachers: Dict[str, List[Dict]] = {}
+        rooms: Dict[str, List[Dict]] = {}
+        subjects: Dict[str, List[str]] = {}
+        # Занятость по (день, пара, четность недели): занятие без четности занимает обе
+        busy: Dict[Tuple[str, str, str], set] = {}
+        all_rooms = set()
+        times = set()
+
+        for group_id, schedule in schedules:
+            for day in DAYS:
+                for lesson in schedule.get(day) or []:
+                    slot = {"group": group_id, "day": day, **lesson}
+                    teachers.setdefault(normalize_key(lesson["teacher"]), []).append(slot)
+                    rooms.setdefault(normalize_key(lesson["room"]), []).append(slot)
+                    groups = subjects.setdefault(normalize_key(lesson["name"]), [])
+                    if not groups or groups[-1] != group_id:
+                        groups.append(group_id)
+                    for parity in (lesson["week"],) if lesson.get("week") else WEEK_PARITIES:
+                        busy.setdefault((day, lesson["time"], parity), set()).add(lesson["room"])
+                    all_rooms.add(lesson["room"])
+                    times.add(lesson["time"])
+
+        # Пары по порядку начала: номер пары = позиция в этом списке + 1
+        self.times: List[str] = sorted(times, key=_start_minutes)
+        self._teachers = {key: make_resource(dumps(_sort_slots(slots))) for key, slots in teachers.items()}
+        self._rooms = {key: make_resource(dumps(_sort_slots(slots))) for key, slots in rooms.items()}
+        self._subjects = {key: make_resource(dumps(sorted(set(groups)))) for key, groups in subjects.items()}
+        self._free_rooms = {
+            (day, time, parity): make_resource(dumps(sorted(all_rooms - busy.get((day, time, parity), set()))))
+            for day in DAYS
+            for time in self.times
+            for parity in WEEK_PARITIES
+        }
+
+    def teacher(self, name: str) -> Optional[Resource]:
+        return self._teachers.get(normalize_key(name))
+
+    def room(self, room: str) -> Optional[Resource]:
+        return self._rooms.get(normalize_key(room))
+
+    def subject(self, name: str) -> Optional[Resource]:
+        return self._subjects.get(normalize_key(name))
+
+    def resolve_slot(self, slot: str) -> Optional[str]:
+        """Время пары по номеру ("2"), началу ("10:45") или полному интервалу"""
+        slot = slot.strip()
+        if slot.isdigit():
+            number = int(slot)
+            return self.times[number - 1] if 1 <= number <= len(self.times) else None
+        start = _START_TIME_RE.match(slot)
+        for time in self.times:
+            if time == slot or (start and _start_minutes(time) == _start_minutes(slot)):
+                return time
+        return None
+
+    def free_rooms(self, day: str, time: str, parity: str) -> Optional[Resource]:
+        """Свободные аудитории в день и пару недели с четностью parity ("odd" или "even")"""
+        return self._free_rooms.get((day, time, parity))
+
+
+def _sort_slots(slots: List[Dict]) -> List[Dict]:
+    return sorted(slots, key=lambda slot: (DAYS.index(slot["day"]), _start_minutes(slot["time"]), slot["group"]))
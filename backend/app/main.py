@@ -1,11 +1,32 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Path, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from typing import List, Dict, Optional
-from .static_data import INSTITUTES, GROUPS, get_schedule
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from datetime import date
+from typing import List, Optional
+from .store import get_store
+from .responses import API_CACHE_CONTROL, cached_response, dumps
+from .shell import PageShell, SHELL_CACHE_CONTROL
+from .assets import StaticAssets
+from .render import RenderCache, render_group_page, render_institute_page
+from .batch import MAX_BATCH_GROUPS, iter_schedule_lines
+from .lookup import DAYS
+from .compact import RECORD_SIZE
+from .search import MAX_SEARCH_LIMIT, SEARCH_LIMIT
+from .weeks import DateViews, today, week_parity
+from .ical import IcalFeeds, feed_response
+from .changes import ChangeLog
+from .push import MAX_SUBSCRIBE_GROUPS, PushHub, encode_event
+from .refresh import SnapshotWatcher, SOURCE_URL
+from .store import SNAPSHOT_PATH
+from .live import LiveSchedules, LIVE_TTL
+from .metrics import METRICS_MEDIA_TYPE, MetricsMiddleware, RequestMetrics, exposition
+import asyncio
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="MAI Schedule")
 
 # Настройка CORS
@@ -17,68 +38,351 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Задержки и статусы по маршрутам для /metrics
+request_metrics = RequestMetrics()
+app.add_middleware(MetricsMiddleware, metrics=request_metrics, routes=lambda: app.routes)
+
 # Получаем абсолютный путь к директории frontend
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 FRONTEND_DIR = os.path.join(BASE_DIR, "frontend")
 
-# Монтируем статические файлы
-app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+# Публичные статические файлы: в памяти, заранее сжатые, с хешем в URL
+static_assets = StaticAssets(FRONTEND_DIR)
+
+# index.html держим в памяти вместе со сжатыми вариантами и хешированными ссылками
+index_shell = PageShell(os.path.join(FRONTEND_DIR, "index.html"), transform=static_assets.rewrite)
+
+# Отрендеренные страницы групп и институтов
+render_cache = RenderCache()
+
+# Расписания по датам на текущую и следующую недели
+date_views = DateViews()
+
+# Календари (.ics) групп и преподавателей на семестр
+ical_feeds = IcalFeeds()
+
+# Изменения расписаний между версиями данных для /api/schedule/{id}/changes
+change_log = ChangeLog()
+
+# Подписки на изменения расписаний (SSE)
+push_hub = PushHub()
+
+# Подхват снимка, который пишет обходчик (python -m app.refresh); сам воркер сайт не обходит
+snapshot_watcher = SnapshotWatcher(SNAPSHOT_PATH, change_log=change_log, push_hub=push_hub) if SNAPSHOT_PATH else None
+
+# Расписания с сайта по запросу (если задан еще и SCHEDULE_LIVE_TTL)
+live_schedules = LiveSchedules(SOURCE_URL, LIVE_TTL) if SOURCE_URL and LIVE_TTL else None
+
+# Фоновая сборка индексов при запуске; ссылка держится, чтобы ошибка не потерялась
+index_warmup: Optional[asyncio.Future] = None
+
+def _warmup_done(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Не удалось построить индексы хранилища", exc_info=future.exception())
+
+@app.on_event("startup")
+async def build_schedule_store():
+    """Строим хранилище расписаний один раз при запуске"""
+    global index_warmup
+    store = get_store()
+    # Обратные индексы и поиск достраиваются в фоне: воркер готов отвечать сразу
+    index_warmup = asyncio.get_running_loop().run_in_executor(None, store.prepare)
+    index_warmup.add_done_callback(_warmup_done)
+    index_shell.variants()
+    if snapshot_watcher:
+        snapshot_watcher.start()
+    if live_schedules:
+        await live_schedules.start()
+
+@app.on_event("shutdown")
+async def stop_background():
+    if snapshot_watcher:
+        await snapshot_watcher.stop()
+    if live_schedules:
+        await live_schedules.stop()
 
 @app.get("/", response_class=HTMLResponse)
-async def get_index():
+async def get_index(request: Request):
     """Главная страница"""
-    with open(os.path.join(FRONTEND_DIR, "index.html"), "r", encoding="utf-8") as f:
-        return f.read()
+    return index_shell.response(request)
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def get_static(request: Request, path: str):
+    """Статические файлы frontend (исходники не отдаются)"""
+    response = static_assets.response(request, path)
+    if response is None:
+        raise HTTPException(status_code=404, detail="Файл не найден")
+    return response
 
 @app.get("/institute/{institute_id}", response_class=HTMLResponse)
-async def get_institute_page(institute_id: str):
+async def get_institute_page(request: Request, institute_id: str):
     """Страница института"""
-    if institute_id not in GROUPS:
+    store = get_store()
+    if not store.index.has_institute(institute_id):
         raise HTTPException(status_code=404, detail=f"Институт с ID {institute_id} не найден")
     
-    with open(os.path.join(FRONTEND_DIR, "index.html"), "r", encoding="utf-8") as f:
-        content = f.read()
-        # Здесь можно добавить динамическую генерацию HTML для конкретного института
-        return content
+    page = render_cache.get_or_render(
+        ("institute", institute_id, store.token),
+        lambda: static_assets.rewrite(
+            render_institute_page(store.index.institute_name(institute_id), store.index.courses(institute_id))
+        ),
+    )
+    return cached_response(request, page, media_type="text/html", cache_control=SHELL_CACHE_CONTROL)
 
 @app.get("/group/{group_id}", response_class=HTMLResponse)
-async def get_group_page(group_id: str):
+async def get_group_page(request: Request, group_id: str):
     """Страница группы"""
-    schedule = get_schedule(group_id)
-    if not schedule:
+    store = get_store()
+    record = store.index.get(group_id)
+    if record is None:
         raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
     
-    with open(os.path.join(FRONTEND_DIR, "index.html"), "r", encoding="utf-8") as f:
-        content = f.read()
-        # Здесь можно добавить динамическую генерацию HTML для конкретной группы
-        return content
+    page = render_cache.get_or_render(
+        ("group", group_id, store.token),
+        lambda: static_assets.rewrite(render_group_page(record.group["name"], store.get_schedule(group_id).body)),
+    )
+    return cached_response(request, page, media_type="text/html", cache_control=SHELL_CACHE_CONTROL)
 
 # Оставляем API endpoints для возможного использования в будущем
 @app.get("/api/institutes")
-async def get_institutes():
+async def get_institutes(request: Request):
     """Получение списка институтов"""
-    return INSTITUTES
+    return cached_response(request, get_store().get_institutes())
 
 @app.get("/api/groups/{institute_id}")
-async def get_groups(institute_id: str, course: Optional[int] = None):
+async def get_groups(request: Request, institute_id: str, course: Optional[int] = None):
     """Получение списка групп для института"""
-    if institute_id not in GROUPS:
+    store = get_store()
+    if not store.index.has_institute(institute_id):
         raise HTTPException(status_code=404, detail=f"Институт с ID {institute_id} не найден")
         
     if course:
-        course_str = str(course)
-        if course_str in GROUPS[institute_id]:
-            return GROUPS[institute_id][course_str]
-        else:
+        resource = store.get_groups(institute_id, str(course))
+        if resource is None:
             raise HTTPException(status_code=404, detail=f"Курс {course} не найден в институте {institute_id}")
+        return cached_response(request, resource)
     
     # Если курс не указан, возвращаем все группы института
-    all_groups = []
-    for course_groups in GROUPS[institute_id].values():
-        all_groups.extend(course_groups)
-    return all_groups
+    return cached_response(request, store.get_groups(institute_id))
 
 @app.get("/api/schedule/{group_id}")
-async def get_schedule_endpoint(group_id: str):
+async def get_schedule_endpoint(request: Request, group_id: str):
     """Получение расписания для группы"""
-    return get_schedule(group_id) 
\ No newline at end of file
+    store = get_store()
+    if group_id not in store.index:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    resource = store.get_schedule(group_id)
+    if live_schedules:
+        try:
+            resource = await live_schedules.get(group_id, resource)
+        except Exception:
+            raise HTTPException(status_code=503, detail=f"Расписание группы {group_id} временно недоступно")
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    return cached_response(request, resource)
+
+@app.get("/api/schedule/{group_id}/changes")
+async def get_schedule_changes(request: Request, group_id: str, since: str = Query(..., min_length=1, max_length=100)):
+    """Изменения расписания группы после версии since («эпоха.номер») или все расписание, если отстали слишком сильно"""
+    store = get_store()
+    if group_id not in store.compact:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    return cached_response(request, change_log.since(store, group_id, since))
+
+@app.get("/api/events")
+async def get_schedule_events(request: Request, groups: str = Query(..., min_length=1)):
+    """Поток изменений расписаний групп (Server-Sent Events); groups - id через запятую.
+
+    После переподключения с Last-Event-ID сначала приходят пропущенные изменения.
+    """
+    group_ids = list(dict.fromkeys(group_id.strip() for group_id in groups.split(",") if group_id.strip()))
+    if len(group_ids) > MAX_SUBSCRIBE_GROUPS:
+        raise HTTPException(status_code=413, detail=f"Не больше {MAX_SUBSCRIBE_GROUPS} групп на подписку")
+    store = get_store()
+    missing = [group_id for group_id in group_ids if group_id not in store.compact]
+    if missing or not group_ids:
+        raise HTTPException(status_code=404, detail=f"Группы не найдены: {', '.join(missing)}")
+
+    initial = [encode_event("hello", b'{"version":' + dumps(store.token) + b"}", store.token)]
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id and last_event_id != store.token:
+        # Версия другой эпохи или отставание больше журнала - в catchup придет расписание целиком
+        for group_id in group_ids:
+            body = change_log.since(store, group_id, last_event_id).body
+            initial.append(encode_event("catchup", b'{"group":' + dumps(group_id) + b',"changes":' + body + b"}", store.token))
+
+    return StreamingResponse(
+        push_hub.stream(group_ids, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/schedule/{group_id}/today")
+async def get_schedule_today(request: Request, group_id: str):
+    """Занятия группы на сегодня с учетом четности недели"""
+    store = get_store()
+    if group_id not in store.index:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    return cached_response(request, date_views.today(store, group_id))
+
+@app.get("/api/schedule/{group_id}/week/{number}")
+async def get_schedule_week(request: Request, group_id: str, number: int = Path(..., ge=1, le=53)):
+    """Занятия группы по датам учебной недели number"""
+    store = get_store()
+    if group_id not in store.index:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    return cached_response(request, date_views.week(store, group_id, number))
+
+@app.get("/ical/{group_id}.ics")
+async def get_group_calendar(request: Request, group_id: str):
+    """Расписание группы на семестр в формате iCalendar для подписки"""
+    store = get_store()
+    if group_id not in store.compact:
+        raise HTTPException(status_code=404, detail=f"Группа {group_id} не найдена")
+    return feed_response(request, ical_feeds.group(store, group_id))
+
+@app.get("/ical/teacher/{name}.ics")
+async def get_teacher_calendar(request: Request, name: str):
+    """Занятия преподавателя на семестр в формате iCalendar"""
+    feed = ical_feeds.teacher(get_store(), name)
+    if feed is None:
+        raise HTTPException(status_code=404, detail=f"Преподаватель {name} не найден")
+    return feed_response(request, feed)
+
+@app.get("/api/teacher/{name}")
+async def get_teacher_slots(request: Request, name: str):
+    """Все занятия преподавателя"""
+    resource = get_store().lookup.teacher(name)
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Преподаватель {name} не найден")
+    return cached_response(request, resource)
+
+@app.get("/api/room/{room}")
+async def get_room_slots(request: Request, room: str):
+    """Все занятия в аудитории"""
+    resource = get_store().lookup.room(room)
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Аудитория {room} не найдена")
+    return cached_response(request, resource)
+
+@app.get("/api/subject/{name}")
+async def get_subject_groups(request: Request, name: str):
+    """Группы, у которых есть предмет"""
+    resource = get_store().lookup.subject(name)
+    if resource is None:
+        raise HTTPException(status_code=404, detail=f"Предмет {name} не найден")
+    return cached_response(request, resource)
+
+@app.get("/api/free-rooms")
+async def get_free_rooms(
+    request: Request,
+    slot: str,
+    day: Optional[str] = None,
+    on: Optional[date] = Query(None, alias="date"),
+):
+    """Свободные аудитории на пару (номер, начало "10:45" или интервал) в дату date
+    или в день недели day текущей недели; учитывается четность недели"""
+    lookup = get_store().lookup
+    if on is not None:
+        if day is not None and day != DAYS[on.weekday()]:
+            raise HTTPException(status_code=400, detail=f"{on} - не {day}")
+        day = DAYS[on.weekday()]
+    elif day not in DAYS:
+        raise HTTPException(status_code=400, detail=f"Нужна дата или день из: {', '.join(DAYS)}")
+    time = lookup.resolve_slot(slot)
+    if time is None:
+        raise HTTPException(status_code=404, detail=f"Пара {slot} не найдена")
+    parity = week_parity(on if on is not None else today())
+    return cached_response(request, lookup.free_rooms(day, time, parity))
+
+@app.get("/api/search")
+async def search_groups(
+    q: str = Query(..., min_length=1, max_length=64),
+    limit: int = Query(SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT),
+):
+    """Поиск групп по началу id или названия (регистр, раскладка и латиница не важны)"""
+    body = get_store().search.search_json(q, limit)
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": API_CACHE_CONTROL})
+
+class ScheduleBatchRequest(BaseModel):
+    """Запрос расписаний пачкой: список групп и/или целый институт"""
+    groups: List[str] = []
+    institute: Optional[str] = None
+
+@app.post("/api/schedules")
+async def get_schedules_batch(batch: ScheduleBatchRequest):
+    """Расписания многих групп одним запросом (NDJSON, по строке на группу)"""
+    if len(batch.groups) > MAX_BATCH_GROUPS:
+        raise HTTPException(status_code=413, detail=f"Не больше {MAX_BATCH_GROUPS} групп за запрос")
+    
+    store = get_store()
+    group_ids = list(batch.groups)
+    if batch.institute is not None:
+        if not store.index.has_institute(batch.institute):
+            raise HTTPException(status_code=404, detail=f"Институт с ID {batch.institute} не найден")
+        group_ids.extend(group["id"] for group in store.index.institute_groups(batch.institute))
+    
+    return StreamingResponse(iter_schedule_lines(store, group_ids), media_type="application/x-ndjson")
+
+def _metric_families():
+    """Метрики кэшей, обходчика и хранилища, снятые в момент запроса"""
+    store = get_store()
+    caches = {"render": render_cache.stats(), "ical": ical_feeds.stats()}
+    if live_schedules:
+        caches["live"] = live_schedules.cache.stats()
+    families = [
+        ("schedule_cache_hits_total", "counter", "Попадания в кэши",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("schedule_cache_misses_total", "counter", "Промахи кэшей",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("schedule_cache_hit_ratio", "gauge", "Доля попаданий с момента запуска",
+         [({"cache": name}, stats["hits"] / ((stats["hits"] + stats["misses"]) or 1)) for name, stats in caches.items()]),
+        ("schedule_render_cache_bytes", "gauge", "Размер отрендеренных страниц в кэше", [({}, caches["render"]["bytes"])]),
+        ("schedule_push_connections", "gauge", "Открытые SSE-соединения", [({}, push_hub.stats()["connections"])]),
+        ("schedule_push_dropped_total", "counter", "Отключенные медленные подписчики", [({}, push_hub.dropped)]),
+        ("schedule_push_events_total", "counter", "Закодированные и доставленные события",
+         [({"stage": "published"}, push_hub.published), ({"stage": "delivered"}, push_hub.delivered)]),
+        ("schedule_changelog_bytes", "gauge", "Размер журнала изменений", [({}, change_log.stats()["bytes"])]),
+        ("schedule_store_version", "gauge", "Версия данных хранилища", [({}, store.version)]),
+        ("schedule_store_groups", "gauge", "Число групп в хранилище", [({}, len(store))]),
+        ("schedule_store_lessons", "gauge", "Число занятий в компактном представлении",
+         [({}, len(store.compact.records) // RECORD_SIZE)]),
+    ]
+    if live_schedules:
+        families.append(("schedule_live_stale_served_total", "counter", "Устаревшие ответы на время фонового обновления",
+                         [({}, caches["live"]["stale_hits"])]))
+        families.append(("schedule_live_coalesced_total", "counter", "Загрузки, объединенные single-flight",
+                         [({}, caches["live"]["flight_coalesced"])]))
+    # Счетчики загрузок (FetchStats.as_dict): обходчик присылает их через файл рядом со снимком
+    crawler = snapshot_watcher.crawler if snapshot_watcher else None
+    scrapers = []
+    if crawler and crawler.get("fetch"):
+        scrapers.append(("refresh", crawler["fetch"]))
+    if live_schedules and live_schedules.stats:
+        scrapers.append(("live", live_schedules.stats.as_dict()))
+    if scrapers:
+        families += [
+            ("scraper_pages_total", "counter", "Загруженные страницы", [({"source": name}, stats["pages"]) for name, stats in scrapers]),
+            ("scraper_fetch_seconds_total", "counter", "Суммарное время загрузок", [({"source": name}, stats["fetch_seconds"]) for name, stats in scrapers]),
+            ("scraper_parse_seconds_total", "counter", "Суммарное время разбора HTML", [({"source": name}, stats["parse_seconds"]) for name, stats in scrapers]),
+            ("scraper_failures_total", "counter", "Неудачные загрузки",
+             [({"source": name}, sum(stats["failures"].values())) for name, stats in scrapers]),
+        ]
+    if snapshot_watcher:
+        families.append(("schedule_snapshot_reloads_total", "counter", "Загрузки снимка обходчика по результату",
+                         [({"result": "success"}, snapshot_watcher.reloads), ({"result": "failure"}, snapshot_watcher.failures)]))
+    if crawler:
+        families.append(("schedule_refresh_total", "counter", "Обходы сайта по результату",
+                         [({"result": "success"}, crawler["refreshes"]), ({"result": "failure"}, crawler["failures"])]))
+        if crawler.get("last_duration") is not None:
+            families.append(("schedule_refresh_duration_seconds", "gauge", "Длительность последнего обхода",
+                             [({}, crawler["last_duration"])]))
+        if crawler.get("last_success") is not None:
+            families.append(("schedule_refresh_last_success_timestamp_seconds", "gauge", "Время последнего удачного обхода",
+                             [({}, crawler["last_success"])]))
+    return families
+
+@app.get("/metrics")
+async def get_metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return Response(exposition(request_metrics, _metric_families()), media_type=METRICS_MEDIA_TYPE)
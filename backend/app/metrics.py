@@ -0,0 +1,175 @@
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Границы корзин гистограммы задержек (секунды)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Кодировку utf-8 Starlette добавляет сам
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4"
+# Потоковые ответы, которые не учитываются в задержках (см. RequestMetrics)
+STREAM_MEDIA_TYPE = b"text/event-stream"
+
+# Метрика для выдачи: (имя, тип, описание, [(метки, значение)])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами; в корзине хранится только ее собственный счет"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[float, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield bound, total
+
+
+class RequestMetrics:
+    """Счетчики запросов по маршрутам: гистограммы задержек, статусы и число запросов в работе.
+
+    Потоки text/event-stream считаются отдельно: они висят часами, и в задержках
+    и в запросах в работе только заслоняли бы обычные ответы.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.in_flight = 0
+        self.streams = 0
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.responses: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: Optional[float]) -> None:
+        """Ответ по маршруту; seconds=None - поток, в гистограмму задержек не попадает"""
+        if seconds is not None:
+            key = (method, route)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+        status_key = (method, route, str(status))
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def lines(self) -> List[str]:
+        lines = [
+            "# HELP http_requests_in_flight Запросы в обработке",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# HELP http_streams_open Открытые потоковые ответы (text/event-stream)",
+            "# TYPE http_streams_open gauge",
+            f"http_streams_open {self.streams}",
+            "# HELP http_requests_total Ответы по маршрутам и статусам",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.responses.items()):
+            lines.append(f"http_requests_total{_labels({'method': method, 'route': route, 'status': status})} {count}")
+        lines += [
+            "# HELP http_request_duration_seconds Время обработки запроса до отправки ответа целиком",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            for bound, total in histogram.cumulative():
+                labels = _labels({"method": method, "route": route, "le": _value(bound)})
+                lines.append(f"http_request_duration_seconds_bucket{labels} {total}")
+            labels = _labels({"method": method, "route": route})
+            lines.append(f"http_request_duration_seconds_sum{labels} {_value(histogram.sum)}")
+            lines.append(f"http_request_duration_seconds_count{labels} {histogram.count}")
+        return lines
+
+
+def render_families(families: Iterable[Family]) -> List[str]:
+    lines = []
+    for name, kind, description, samples in families:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{_labels(labels)} {_value(value)}")
+    return lines
+
+
+def exposition(requests: RequestMetrics, families: Iterable[Family]) -> bytes:
+    """Текстовый формат Prometheus"""
+    return ("\n".join(requests.lines() + render_families(families)) + "\n").encode("utf-8")
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: время до конца ответа, статус и маршрут (шаблон пути, а не сам путь).
+
+    Шаблон берется по endpoint, который роутер записывает в scope, поэтому
+    число меток не растет от id групп в URL.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics, routes: Callable[[], Iterable] = None):
+        self.app = app
+        self.metrics = metrics
+        self._routes = routes
+        self._templates: Optional[Dict[object, str]] = None
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._templates is None:
+            self._templates = {route.endpoint if hasattr(route, "endpoint") else route.app: route.path for route in self._routes()}
+        return self._templates.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        streaming = False
+        metrics = self.metrics
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = dict(message.get("headers", ())).get(b"content-type", b"")
+                if content_type.startswith(STREAM_MEDIA_TYPE):
+                    # Поток SSE: из запросов в работе переходит в открытые потоки
+                    streaming = True
+                    metrics.in_flight -= 1
+                    metrics.streams += 1
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if streaming:
+                metrics.streams -= 1
+                metrics.observe(scope["method"], self._route(scope), status, None)
+            else:
+                metrics.in_flight -= 1
+                metrics.observe(scope["method"], self._route(scope), status, time.perf_counter() - started)
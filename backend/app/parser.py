@@ -1,43 +1,292 @@
 import aiohttp
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
-import json
+import asyncio
+import random
+import time
+from bs4 import BeautifulSoup, SoupStrainer
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from yarl import URL
+from .crawl_state import CrawlState
+from .transport import HttpTransport
 import re
 
+# Ответы, которые имеет смысл повторить
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Страницу не удалось получить после всех попыток"""
+
+    def __init__(self, kind: str, url: str):
+        super().__init__(f"{kind}: {url}")
+        self.kind = kind
+        self.url = url
+
+
+class FetchStats:
+    """Счетчики загрузок: страницы, байты, повторы и причины ошибок"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.pages = 0
+        self.bytes = 0
+        self.retries = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.fetch_seconds = 0.0
+        self.parses = 0
+        self.parse_seconds = 0.0
+        self.failures = Counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            "pages": self.pages,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "fetch_seconds": round(self.fetch_seconds, 3),
+            "parse_seconds": round(self.parse_seconds, 3),
+            "elapsed": round(self.elapsed, 3),
+            "pages_per_second": round(self.pages_per_second, 1),
+            "failures": dict(self.failures),
+        }
+
+
+# Бэкенды разбора HTML: имя -> (парсер BeautifulSoup, строить ли только целевой элемент)
+PARSER_BACKENDS = {
+    'html.parser': ('html.parser', False),
+    'strainer': ('html.parser', True),
+}
+try:
+    import lxml  # noqa: F401  (необязательная зависимость)
+except ImportError:
+    pass
+else:
+    PARSER_BACKENDS['lxml'] = ('lxml', False)
+    PARSER_BACKENDS['lxml-strainer'] = ('lxml', True)
+
+# strainer дает тот же результат, что и полный html.parser, но без лишнего дерева
+DEFAULT_PARSER_BACKEND = 'strainer'
+
+INSTITUTE_SELECT = SoupStrainer('select', attrs={'name': 'institute'})
+GROUP_SELECT = SoupStrainer('select', attrs={'name': 'group'})
+SCHEDULE_TABLE = SoupStrainer('table', attrs={'class': 'schedule'})
+
+
+def _make_soup(html: str, backend: str, target: SoupStrainer) -> BeautifulSoup:
+    """Дерево документа; *-strainer строят только нужный элемент"""
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный парсер {backend!r}, доступны: {', '.join(PARSER_BACKENDS)}")
+    features, limited = PARSER_BACKENDS[backend]
+    return BeautifulSoup(html, features, parse_only=target if limited else None)
+
+
+def parse_institutes(html: str, backend: str = DEFAULT_PARSER_BACKEND) -> List[Dict[str, str]]:
+    """Список институтов со страницы расписания"""
+    soup = _make_soup(html, backend, INSTITUTE_SELECT)
+    institute_select = soup.find('select', {'name': 'institute'})
+    
+    if not institute_select:
+        return []
+        
+    institutes = []
+    for option in institute_select.find_all('option'):
+        if option.get('value') and option.text.strip():
+            institutes.append({
+                'id': option['value'],
+                'name': option.text.strip()
+            })
+            
+    return institutes
+
+
+def parse_groups(html: str, backend: str = DEFAULT_PARSER_BACKEND) -> List[Dict[str, str]]:
+    """Список групп со страницы института"""
+    soup = _make_soup(html, backend, GROUP_SELECT)
+    group_select = soup.find('select', {'name': 'group'})
+    
+    if not group_select:
+        return []
+        
+    groups = []
+    for option in group_select.find_all('option'):
+        if option.get('value') and option.text.strip():
+            group_name = option.text.strip()
+            # Извлекаем номер курса из названия группы
+            course_match = re.search(r'(\d+)', group_name)
+            course_number = int(course_match.group(1)) if course_match else None
+            
+            groups.append({
+                'id': option['value'],
+                'name': group_name,
+                'course': course_number
+            })
+            
+    return groups
+
+
+def parse_schedule(html: str, backend: str = DEFAULT_PARSER_BACKEND) -> Dict:
+    """Расписание группы из таблицы table.schedule"""
+    soup = _make_soup(html, backend, SCHEDULE_TABLE)
+    schedule_table = soup.find('table', {'class': 'schedule'})
+    
+    if not schedule_table:
+        return {'error': 'Расписание не найдено'}
+        
+    schedule = {
+        'monday': [],
+        'tuesday': [],
+        'wednesday': [],
+        'thursday': [],
+        'friday': [],
+        'saturday': [],
+        'sunday': []
+    }
+    
+    current_day = None
+    for row in schedule_table.find_all('tr'):
+        # Проверяем, является ли строка заголовком дня
+        day_header = row.find('th', {'colspan': '4'})
+        if day_header:
+            day_name = day_header.text.strip().lower()
+            current_day = day_name
+            continue
+            
+        if current_day and row.find_all('td'):
+            cells = row.find_all('td')
+            if len(cells) >= 4:
+                lesson = {
+                    'time': cells[0].text.strip(),
+                    'name': cells[1].text.strip(),
+                    'teacher': cells[2].text.strip(),
+                    'room': cells[3].text.strip()
+                }
+                schedule[current_day].append(lesson)
+                
+    return schedule
+
+
 class MAIParser:
     BASE_URL = "https://mai.ru/education/studies/schedule/groups.php"
     
-    def __init__(self):
-        self.session = None
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        concurrency: int = 16,
+        limit_per_host: int = 8,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        parser_backend: str = DEFAULT_PARSER_BACKEND,
+        parse_workers: int = 0,
+        state: Optional[CrawlState] = None,
+        transport=None,
+    ):
+        if parser_backend not in PARSER_BACKENDS:
+            raise ValueError(f"Неизвестный парсер {parser_backend!r}, доступны: {', '.join(PARSER_BACKENDS)}")
+        self.base_url = base_url or self.BASE_URL
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.parser_backend = parser_backend
+        # parse_workers > 0: разбор HTML в отдельных процессах, сеть остается в asyncio
+        self.parse_workers = parse_workers
+        self._executor = None
+        # Валидаторы для условных запросов при повторных обходах
+        self.state = state
+        self.stats = FetchStats()
+        # Откуда берутся страницы: сайт (HttpTransport) или записанный корпус (см. transport)
+        self.transport = transport or HttpTransport(concurrency, limit_per_host, self.timeout)
+        self._semaphore = None
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
+        await self.transport.open()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.stats = FetchStats()
+        if self.parse_workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        await self.transport.close()
+        if self._executor:
+            # Ожидание процессов пула - в потоке, чтобы не останавливать цикл событий
+            executor, self._executor = self._executor, None
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown, True)
+
+    async def _parse(self, parse: Callable[[str, str], object], html: str):
+        """Разбор страницы в пуле процессов или прямо в цикле событий"""
+        started = time.monotonic()
+        try:
+            if self._executor is None:
+                return parse(html, self.parser_backend)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, parse, html, self.parser_backend)
+        finally:
+            self.stats.parses += 1
+            self.stats.parse_seconds += time.monotonic() - started
+
+    async def _fetch(self, params: Optional[Dict[str, str]] = None, conditional: bool = False) -> Optional[str]:
+        """Загрузка страницы с ограничением параллельности и повторами с экспоненциальной паузой.
+
+        При conditional=True и заданном state отправляется условный GET; если страница
+        не изменилась (304 или тот же хэш тела), возвращается None.
+        """
+        url = str(URL(self.base_url).with_query(params or {}))
+        conditional = conditional and self.state is not None
+        headers = self.state.request_headers(url) if conditional else None
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                started = time.monotonic()
+                try:
+                    response = await self.transport.get(self.base_url, params, headers)
+                except asyncio.TimeoutError:
+                    kind = "timeout"
+                except aiohttp.ClientError:
+                    kind = "connection"
+                else:
+                    if response.status == 304 and conditional:
+                        self.stats.not_modified += 1
+                        self.stats.fetch_seconds += time.monotonic() - started
+                        return None
+                    if response.status in RETRY_STATUSES:
+                        kind = f"http_{response.status}"
+                    elif response.status >= 400:
+                        self.stats.failures[f"http_{response.status}"] += 1
+                        raise FetchError(f"http_{response.status}", url)
+                    else:
+                        body = response.body
+                        self.stats.pages += 1
+                        self.stats.bytes += len(body)
+                        self.stats.fetch_seconds += time.monotonic() - started
+                        if conditional and not self.state.update(url, body, response.headers):
+                            self.stats.unchanged += 1
+                            return None
+                        return body.decode(response.encoding, errors="replace")
+
+                if attempt < self.retries:
+                    self.stats.retries += 1
+                    await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+            self.stats.failures[kind] += 1
+            raise FetchError(kind, url)
             
     async def get_institutes(self) -> List[Dict[str, str]]:
         """Получение списка институтов"""
-        async with self.session.get(self.BASE_URL) as response:
-            html = await response.text()
-            
-        soup = BeautifulSoup(html, 'html.parser')
-        institute_select = soup.find('select', {'name': 'institute'})
-        
-        if not institute_select:
-            return []
-            
-        institutes = []
-        for option in institute_select.find_all('option'):
-            if option.get('value') and option.text.strip():
-                institutes.append({
-                    'id': option['value'],
-                    'name': option.text.strip()
-                })
-                
-        return institutes
+        html = await self._fetch()
+        return await self._parse(parse_institutes, html)
         
     async def get_groups(self, institute_id: str, course: Optional[int] = None) -> List[Dict[str, str]]:
         """Получение списка групп для института и курса"""
@@ -45,72 +294,19 @@ class MAIParser:
         if course:
             params['course'] = str(course)
             
-        async with self.session.get(self.BASE_URL, params=params) as response:
-            html = await response.text()
-            
-        soup = BeautifulSoup(html, 'html.parser')
-        group_select = soup.find('select', {'name': 'group'})
-        
-        if not group_select:
-            return []
-            
-        groups = []
-        for option in group_select.find_all('option'):
-            if option.get('value') and option.text.strip():
-                group_name = option.text.strip()
-                # Извлекаем номер курса из названия группы
-                course_match = re.search(r'(\d+)', group_name)
-                course_number = int(course_match.group(1)) if course_match else None
-                
-                groups.append({
-                    'id': option['value'],
-                    'name': group_name,
-                    'course': course_number
-                })
-                
-        return groups
+        html = await self._fetch(params)
+        return await self._parse(parse_groups, html)
         
     async def get_schedule(self, group_id: str) -> Dict:
         """Получение расписания для группы"""
         params = {'group': group_id}
         
-        async with self.session.get(self.BASE_URL, params=params) as response:
-            html = await response.text()
-            
-        soup = BeautifulSoup(html, 'html.parser')
-        schedule_table = soup.find('table', {'class': 'schedule'})
-        
-        if not schedule_table:
-            return {'error': 'Расписание не найдено'}
-            
-        schedule = {
-            'monday': [],
-            'tuesday': [],
-            'wednesday': [],
-            'thursday': [],
-            'friday': [],
-            'saturday': [],
-            'sunday': []
-        }
-        
-        current_day = None
-        for row in schedule_table.find_all('tr'):
-            # Проверяем, является ли строка заголовком дня
-            day_header = row.find('th', {'colspan': '4'})
-            if day_header:
-                day_name = day_header.text.strip().lower()
-                current_day = day_name
-                continue
-                
-            if current_day and row.find_all('td'):
-                cells = row.find_all('td')
-                if len(cells) >= 4:
-                    lesson = {
-                        'time': cells[0].text.strip(),
-                        'name': cells[1].text.strip(),
-                        'teacher': cells[2].text.strip(),
-                        'room': cells[3].text.strip()
-                    }
-                    schedule[current_day].append(lesson)
-                    
-        return schedule 
\ No newline at end of file
+        html = await self._fetch(params)
+        return await self._parse(parse_schedule, html)
+
+    async def get_schedule_if_changed(self, group_id: str) -> Optional[Dict]:
+        """Расписание группы или None, если страница не менялась с прошлого обхода"""
+        html = await self._fetch({'group': group_id}, conditional=True)
+        if html is None:
+            return None
+        return await self._parse(parse_schedule, html)
@@ -0,0 +1,139 @@
+import asyncio
+import os
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+from .responses import dumps
+
+# Сколько событий может ждать отправки одному подписчику; дальше он отключается
+SUBSCRIBER_BUFFER = int(os.environ.get("SCHEDULE_PUSH_BUFFER", "16"))
+# Интервал комментариев-пингов, чтобы прокси не закрывали простаивающие соединения
+HEARTBEAT_INTERVAL = 25.0
+# Сколько групп можно отслеживать одним соединением
+MAX_SUBSCRIBE_GROUPS = 50
+
+HEARTBEAT = b": ping\n\n"
+DROPPED = b"event: dropped\ndata: {}\n\n"
+
+
+def encode_event(event: str, data: bytes, event_id: Optional[str] = None) -> bytes:
+    """Событие SSE; data - JSON в одну строку"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode("utf-8") + data + b"\n\n"
+
+
+class Subscriber:
+    """Одно соединение: группы, короткий буфер событий и ожидающий future.
+
+    В простое это несколько слотов и пустой список, без очередей и своих задач.
+    """
+
+    __slots__ = ("groups", "limit", "dropped", "_buffer", "_waiter")
+
+    def __init__(self, groups: Iterable[str], limit: int):
+        self.groups = tuple(groups)
+        self.limit = limit
+        self.dropped = False
+        self._buffer: List[bytes] = []
+        self._waiter: Optional[asyncio.Future] = None
+
+    def _wake(self) -> None:
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    def push(self, event: bytes) -> bool:
+        """Событие в буфер; False, если буфер полон и подписчик отключен"""
+        if self.dropped:
+            return False
+        if len(self._buffer) >= self.limit:
+            self.dropped = True
+            self._buffer = []
+            self._wake()
+            return False
+        self._buffer.append(event)
+        self._wake()
+        return True
+
+    async def events(self, heartbeat: float) -> AsyncIterator[bytes]:
+        """Накопленные события одним куском; пинг, если за heartbeat ничего не пришло"""
+        while not self.dropped:
+            if not self._buffer:
+                self._waiter = asyncio.get_running_loop().create_future()
+                try:
+                    await asyncio.wait_for(self._waiter, heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                finally:
+                    self._waiter = None
+            if self._buffer:
+                chunk, self._buffer = b"".join(self._buffer), []
+                yield chunk
+        yield DROPPED
+
+
+class PushHub:
+    """Подписки на изменения групп. Событие кодируется один раз на группу и
+    одни и те же байты раздаются всем ее подписчикам."""
+
+    def __init__(self, buffer_size: int = SUBSCRIBER_BUFFER, heartbeat: float = HEARTBEAT_INTERVAL):
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._connections = 0
+
+    def subscribe(self, groups: Iterable[str]) -> Subscriber:
+        subscriber = Subscriber(groups, self.buffer_size)
+        for group_id in subscriber.groups:
+            self._subscribers.setdefault(group_id, set()).add(subscriber)
+        self._connections += 1
+        return subscriber
+
+    def _detach(self, subscriber: Subscriber) -> None:
+        for group_id in subscriber.groups:
+            subscribers = self._subscribers.get(group_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[group_id]
+
+    def publish(self, version: str, changes: Dict[str, Optional[bytes]]) -> None:
+        """Раздача изменений новой версии (ScheduleStore.token); None - клиенту нужно перезапросить расписание целиком"""
+        for group_id, delta in changes.items():
+            subscribers = self._subscribers.get(group_id)
+            if not subscribers:
+                continue
+            payload = b'{"group":' + dumps(group_id) + b',"version":' + dumps(version)
+            payload += (b',"change":' + delta if delta is not None else b',"full":true') + b"}"
+            event = encode_event("changes", payload, version)
+            self.published += 1
+            for subscriber in list(subscribers):
+                if subscriber.push(event):
+                    self.delivered += 1
+                else:
+                    # Медленный клиент: отключаем, после переподключения он догонит по Last-Event-ID
+                    self.dropped += 1
+                    self._detach(subscriber)
+
+    async def stream(self, groups: Iterable[str], initial: Iterable[bytes] = ()) -> AsyncIterator[bytes]:
+        """Тело ответа text/event-stream. Подписка начинается с первой отправки и
+        снимается при любом завершении, так что незапущенный ответ ничего не держит."""
+        subscriber = self.subscribe(groups)
+        try:
+            for event in initial:
+                yield event
+            async for chunk in subscriber.events(self.heartbeat):
+                yield chunk
+        finally:
+            self._detach(subscriber)
+            self._connections -= 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "connections": self._connections,
+            "groups": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Dict, Optional
+from .store import STATIC_EPOCH_PREFIX, ScheduleStore, build_store, get_store, swap_store, SNAPSHOT_PATH
+
+logger = logging.getLogger(__name__)
+
+# Адрес страницы расписания для обхода
+SOURCE_URL = os.environ.get("SCHEDULE_SOURCE_URL")
+# Пауза между обходами, секунды
+REFRESH_INTERVAL = float(os.environ.get("SCHEDULE_REFRESH_INTERVAL", "3600"))
+# Файл с валидаторами страниц для инкрементального обхода (необязательно)
+CRAWL_STATE_PATH = os.environ.get("SCHEDULE_CRAWL_STATE")
+# Как часто воркеры проверяют, не записал ли обходчик новый снимок, секунды
+SNAPSHOT_POLL_INTERVAL = float(os.environ.get("SCHEDULE_SNAPSHOT_POLL_INTERVAL", "5"))
+
+
+def stats_path(snapshot_path: str) -> str:
+    """Файл со счетчиками обходчика рядом со снимком: их читают воркеры для /metrics"""
+    return snapshot_path + ".stats.json"
+
+
+def new_epoch() -> str:
+    """Эпоха новой линии данных: время запуска и случайный суффикс"""
+    return f"{int(time.time()):x}-{secrets.token_hex(4)}"
+
+
+def crawled_fallback(previous: ScheduleStore) -> Optional[ScheduleStore]:
+    """Прежнее хранилище, если его данные получены обходом; статические за данные сайта не выдаются"""
+    return None if previous.epoch.startswith(STATIC_EPOCH_PREFIX) else previous
+
+
+def store_from_crawl(result, previous: ScheduleStore, epoch: str) -> ScheduleStore:
+    """Новое хранилище из результата обхода.
+
+    Для групп, которые не изменились или не загрузились, берутся данные из
+    предыдущего хранилища, чтобы частичный сбой не стирал расписания. Если там
+    группы нет (или прежние данные статические), сборка падает: пустое или
+    выдуманное расписание вместо настоящего хуже старых данных.
+    """
+    fallback = crawled_fallback(previous)
+
+    def schedule_for(group_id: str) -> Dict:
+        if group_id in result.schedules:
+            return result.schedules[group_id]
+        if fallback is not None and group_id in fallback.compact:
+            return fallback.compact.expand(group_id)
+        raise KeyError(f"нет расписания группы {group_id} ни в обходе, ни в прежних данных")
+
+    # Индексы строятся здесь же, в потоке сборки, а не на первом запросе после подмены
+    return build_store(
+        institutes=result.institutes,
+        groups=result.groups,
+        schedule_func=schedule_for,
+        version=previous.version + 1 if epoch == previous.epoch else 1,
+        epoch=epoch,
+        built_at=int(time.time()),
+    ).prepare()
+
+
+class ScheduleRefresher:
+    """Обходчик: периодически обходит сайт и записывает снимок для воркеров.
+
+    Работает в одном отдельном процессе (python -m app.refresh), а не в каждом
+    воркере: сайт обходится один раз за интервал, и все воркеры видят одну и ту же
+    эпоху и версию данных, загружая снимок (см. SnapshotWatcher).
+    """
+
+    def __init__(
+        self,
+        source_url: str,
+        snapshot_path: str,
+        interval: float = REFRESH_INTERVAL,
+        state_path: Optional[str] = CRAWL_STATE_PATH,
+        parse_workers: int = 0,
+        **parser_options,
+    ):
+        self.source_url = source_url
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.state_path = state_path
+        self.parse_workers = parse_workers
+        # Прочие параметры MAIParser (retries, backoff, transport...)
+        self.parser_options = parser_options
+        self.store: Optional[ScheduleStore] = None
+        self.refreshes = 0
+        self.failures = 0
+        self.last_success: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Счетчики загрузок последнего обхода (FetchStats)
+        self.last_stats = None
+
+    def _load_previous(self) -> ScheduleStore:
+        if self.store is None:
+            if os.path.exists(self.snapshot_path):
+                from .snapshot import load_snapshot
+                try:
+                    self.store = load_snapshot(self.snapshot_path)
+                except ValueError:
+                    # Снимок старого формата или поврежден: его заменит первый же полный обход
+                    logger.warning("Снимок %s не читается, обход начнется с нуля", self.snapshot_path, exc_info=True)
+            if self.store is None:
+                self.store = build_store()
+        return self.store
+
+    async def run(self) -> None:
+        while True:
+            await self.refresh_and_report()
+            await asyncio.sleep(self.interval)
+
+    async def refresh_and_report(self) -> bool:
+        """Обход с учетом результата в счетчиках; счетчики пишутся в stats_path после каждой попытки"""
+        started = time.monotonic()
+        written = False
+        try:
+            written = await self.refresh_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.exception("Не удалось обновить расписания")
+        else:
+            self.refreshes += 1
+            self.last_success = time.time()
+            self.last_error = None
+        self.last_duration = time.monotonic() - started
+        try:
+            await asyncio.to_thread(self._write_stats)
+        except OSError:
+            logger.exception("Не удалось записать счетчики обходчика")
+        return written
+
+    def stats(self) -> Dict:
+        return {
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_success": self.last_success,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+            "fetch": self.last_stats.as_dict() if self.last_stats is not None else None,
+        }
+
+    def _write_stats(self) -> None:
+        path = stats_path(self.snapshot_path)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.stats(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    @staticmethod
+    async def _recover_group_lists(parser, result, fallback: Optional[ScheduleStore]) -> None:
+        """Списки групп, которые не загрузились при обходе: повтор, затем прежние данные.
+
+        Иначе курс молча пропал бы из снимка вместе с расписаниями групп; если
+        взять список неоткуда, обход проваливается.
+        """
+        from .crawler import course_groups
+
+        keys = [key for key in result.failed if key.startswith("groups:")]
+        if not keys:
+            return
+        pages = [tuple(key.split(":")[1:]) for key in keys]
+        lists = await asyncio.gather(
+            *(parser.get_groups(institute_id, int(course)) for institute_id, course in pages),
+            return_exceptions=True,
+        )
+        lost = []
+        for key, (institute_id, course), groups in zip(keys, pages, lists):
+            if not isinstance(groups, Exception):
+                groups = course_groups(groups, course)
+            elif fallback is not None and fallback.index.has_institute(institute_id):
+                # Курса не было и в прежних данных - значит, он был пуст
+                groups = fallback.index.courses(institute_id).get(course)
+            else:
+                lost.append(key)
+                continue
+            del result.failed[key]
+            if groups:
+                result.groups.setdefault(institute_id, {})[course] = groups
+        if lost:
+            raise RuntimeError(f"не удалось получить списки групп: {', '.join(lost[:10])}")
+        # Восстановленные курсы и институты встают на свои места, как при полном обходе
+        order = {institute["id"]: number for number, institute in enumerate(result.institutes)}
+        result.groups = {
+            institute_id: dict(sorted(result.groups[institute_id].items(), key=lambda item: int(item[0])))
+            for institute_id in sorted(result.groups, key=lambda institute_id: order.get(institute_id, len(order)))
+        }
+
+    async def refresh_once(self) -> bool:
+        """Один обход; True, если записан новый снимок"""
+        # Зависимости обходчика нужны только здесь
+        from .crawl_state import CrawlState
+        from .crawler import crawl
+        from .parser import MAIParser
+        from .snapshot import write_snapshot
+
+        previous = await asyncio.to_thread(self._load_previous)
+        # Статические данные не результат обхода: первый обход начинает новую эпоху
+        fallback = crawled_fallback(previous)
+        epoch = previous.epoch if fallback is not None else new_epoch()
+        state = None
+        if self.state_path:
+            state = CrawlState.load(self.state_path)
+            if state.epoch != previous.epoch:
+                # Валидаторы от других данных: «не изменилось» ничего бы не значило
+                logger.info("Валидаторы обхода от другой эпохи (%s), обход полный", state.epoch)
+                state = CrawlState()
+
+        async with MAIParser(base_url=self.source_url, state=state, parse_workers=self.parse_workers, **self.parser_options) as parser:
+            # Счетчики и неудачного обхода тоже попадают в метрики
+            self.last_stats = parser.stats
+            result = await crawl(parser, incremental=state is not None)
+            if not result.institutes or not result.groups:
+                raise RuntimeError("обход вернул пустой список институтов или групп")
+            await self._recover_group_lists(parser, result, fallback)
+            # Группы без свежего расписания и без прежних данных запрашиваются заново без условий
+            missing = [
+                group["id"]
+                for courses in result.groups.values()
+                for groups in courses.values()
+                for group in groups
+                if group["id"] not in result.schedules and (fallback is None or group["id"] not in fallback.compact)
+            ]
+            if missing:
+                schedules = await asyncio.gather(*(parser.get_schedule(group_id) for group_id in missing), return_exceptions=True)
+                failed = [group_id for group_id, schedule in zip(missing, schedules) if isinstance(schedule, Exception)]
+                if failed:
+                    raise RuntimeError(f"не удалось получить расписания новых групп: {', '.join(failed[:10])}")
+                result.schedules.update(zip(missing, schedules))
+
+        unchanged = (
+            not result.schedules
+            and epoch == previous.epoch
+            and result.institutes == previous.index.institutes
+            and result.groups == previous.index.tree
+        )
+        if unchanged:
+            # Инкрементальный обход ничего нового не принес: снимок и версия остаются
+            if state is not None:
+                state.commit()
+                await asyncio.to_thread(state.save, self.state_path)
+            return False
+
+        # Снимок пишется атомарно; воркеры подхватят его сами
+        store = await asyncio.to_thread(store_from_crawl, result, previous, epoch)
+        await asyncio.to_thread(write_snapshot, store, self.snapshot_path)
+        self.store = store
+        if state is not None:
+            state.epoch = store.epoch
+            state.commit()
+            await asyncio.to_thread(state.save, self.state_path)
+
+        logger.info(
+            "Снимок обновлен: эпоха %s, версия %s, групп %s, изменилось %s, ошибок %s",
+            store.epoch, store.version, len(store), len(result.schedules), len(result.failed),
+        )
+        return True
+
+
+class SnapshotWatcher:
+    """Фоновая задача воркера: подхватывает снимок, записанный обходчиком, и подменяет хранилище"""
+
+    def __init__(self, path: str, interval: float = SNAPSHOT_POLL_INTERVAL, change_log=None, push_hub=None):
+        self.path = path
+        self.interval = interval
+        # Журнал изменений (ChangeLog): разница считается здесь, один раз на подмену
+        self.change_log = change_log
+        # Рассылка изменений подписчикам (PushHub); нужна вместе с change_log
+        self.push_hub = push_hub
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload: Optional[float] = None
+        self.last_error: Optional[str] = None
+        # Счетчики обходчика из stats_path (ScheduleRefresher.stats) для /metrics
+        self.crawler: Optional[Dict] = None
+        self._signature = None
+        self._stats_signature = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.exception("Не удалось загрузить снимок %s", self.path)
+
+    def _load(self) -> ScheduleStore:
+        from .snapshot import load_snapshot
+        return load_snapshot(self.path).prepare()
+
+    def _read_crawler_stats(self) -> None:
+        try:
+            stat = os.stat(stats_path(self.path))
+        except FileNotFoundError:
+            return
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._stats_signature:
+            return
+        with open(stats_path(self.path), encoding="utf-8") as f:
+            self.crawler = json.load(f)
+        self._stats_signature = signature
+
+    async def check_once(self) -> bool:
+        """Проверка файла снимка; True, если хранилище подменено"""
+        try:
+            self._read_crawler_stats()
+        except (OSError, ValueError):
+            logger.warning("Не удалось прочитать счетчики обходчика", exc_info=True)
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        store = await asyncio.to_thread(self._load)
+        self._signature = signature
+        previous = get_store()
+        if (store.epoch, store.version) == (previous.epoch, previous.version):
+            return False
+
+        changes = {}
+        if self.change_log is not None:
+            changes = await asyncio.to_thread(self.change_log.record, previous, store)
+        swap_store(store)
+        if self.push_hub is not None:
+            self.push_hub.publish(store.token, changes)
+        self.reloads += 1
+        self.last_reload = time.time()
+        self.last_error = None
+        logger.info("Загружен снимок: эпоха %s, версия %s", store.epoch, store.version)
+        return True
+
+
+def main():
+    """Процесс обходчика: python -m app.refresh [--once]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Периодический обход сайта с записью снимка для воркеров")
+    parser.add_argument("--url", default=SOURCE_URL, help="адрес groups.php (SCHEDULE_SOURCE_URL)")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="файл снимка (SCHEDULE_SNAPSHOT)")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL)
+    parser.add_argument("--parse-workers", type=int, default=0, help="процессы для разбора HTML")
+    parser.add_argument("--once", action="store_true", help="один обход и выход")
+    args = parser.parse_args()
+    if not args.url or not args.snapshot:
+        parser.error("нужны адрес сайта (--url) и путь к снимку (--snapshot)")
+
+    logging.basicConfig(level=logging.INFO)
+    refresher = ScheduleRefresher(args.url, args.snapshot, args.interval, parse_workers=args.parse_workers)
+    if args.once:
+        asyncio.run(refresher.refresh_and_report())
+    else:
+        asyncio.run(refresher.run())
+
+
+if __name__ == "__main__":
+    main()
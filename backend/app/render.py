@@ -0,0 +1,143 @@
+import json
+from collections import OrderedDict
+from html import escape
+from typing import Callable, Dict, Hashable, List
+from .responses import Resource, make_resource
+
+# Ограничение на суммарный размер отрендеренных страниц в кэше
+RENDER_CACHE_BYTES = 8 * 1024 * 1024
+
+WEEK_TITLES = {"odd": "нечетная неделя", "even": "четная неделя"}
+
+DAY_TITLES = {
+    "monday": "Понедельник",
+    "tuesday": "Вторник",
+    "wednesday": "Среда",
+    "thursday": "Четверг",
+    "friday": "Пятница",
+    "saturday": "Суббота",
+    "sunday": "Воскресенье",
+}
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="ru">
+  <head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>{title}</title>
+    <link rel="stylesheet" href="/static/styles.css" />
+  </head>
+  <body>
+    <div class="app-container">
+      <header class="header">
+        <h1 class="title">Расписание группы МАИ</h1>
+      </header>
+      <div class="content">
+{content}
+      </div>
+    </div>
+  </body>
+</html>
+"""
+
+
+def _lesson_html(lesson: Dict[str, str]) -> str:
+    week = lesson.get("week")
+    return (
+        '<div class="lesson">'
+        f'<span class="time">{escape(lesson["time"])}</span>'
+        f'<span class="subject">{escape(lesson["name"])}</span>'
+        f'<span class="teacher">{escape(lesson["teacher"])}</span>'
+        f'<span class="room">{escape(lesson["room"])}</span>'
+        + (f'<span class="week">{WEEK_TITLES[week]}</span>' if week in WEEK_TITLES else "")
+        + "</div>"
+    )
+
+
+def render_group_page(group_name: str, schedule_json: bytes) -> bytes:
+    """HTML-страница группы с расписанием, встроенным прямо в разметку"""
+    schedule = json.loads(schedule_json)
+    days = []
+    for day, title in DAY_TITLES.items():
+        lessons = schedule.get(day) or []
+        if not lessons:
+            continue
+        days.append(
+            f'<div class="day"><h3>{title}</h3><div class="lessons">'
+            + "".join(_lesson_html(lesson) for lesson in lessons)
+            + "</div></div>"
+        )
+    # Исходные данные для скриптов на клиенте, чтобы не делать второй запрос к API
+    data = schedule_json.decode("utf-8").replace("</", "<\\/")
+    content = (
+        '<div class="schedule" id="schedule">'
+        '<a href="/" class="back-button">← Назад к институтам</a>'
+        f"<h2>Расписание группы {escape(group_name)}</h2>"
+        f'<div class="schedule-grid">{"".join(days)}</div>'
+        f'<script id="schedule-data" type="application/json">{data}</script>'
+        "</div>"
+    )
+    title = f"Расписание группы {escape(group_name)}"
+    return PAGE_TEMPLATE.format(title=title, content=content).encode("utf-8")
+
+
+def render_institute_page(institute_name: str, courses: Dict[str, List[Dict]]) -> bytes:
+    """HTML-страница института со списком групп по курсам"""
+    blocks = []
+    for course, groups in courses.items():
+        cards = "".join(
+            f'<a href="/group/{escape(group["id"])}" class="group-card">{escape(group["name"])}</a>'
+            for group in groups
+        )
+        blocks.append(f'<div class="course"><h3>{escape(course)} курс</h3><div class="group-grid">{cards}</div></div>')
+    content = (
+        '<div class="groups" id="groups">'
+        '<a href="/" class="back-button">← Назад к институтам</a>'
+        f"<h2>{escape(institute_name)}</h2>"
+        f'<div class="courses">{"".join(blocks)}</div>'
+        "</div>"
+    )
+    return PAGE_TEMPLATE.format(title=escape(institute_name), content=content).encode("utf-8")
+
+
+class RenderCache:
+    """LRU отрендеренных страниц, ограниченный суммарным размером в байтах"""
+
+    def __init__(self, max_bytes: int = RENDER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Resource]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_render(self, key: Hashable, render: Callable[[], bytes]) -> Resource:
+        resource = self._entries.get(key)
+        if resource is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return resource
+
+        self.misses += 1
+        resource = make_resource(render())
+        if len(resource.body) > self.max_bytes:
+            return resource
+        self._entries[key] = resource
+        self.size += len(resource.body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+            self.evictions += 1
+        return resource
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
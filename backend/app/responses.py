@@ -0,0 +1,86 @@
+import hashlib
+import json
+from typing import Dict, Iterable, NamedTuple, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+# По умолчанию клиенты перепроверяют данные раз в минуту через If-None-Match
+API_CACHE_CONTROL = "public, max-age=60"
+
+
+class Resource(NamedTuple):
+    """Готовое тело ответа и его сильный ETag"""
+    body: bytes
+    etag: str
+
+
+def dumps(obj) -> bytes:
+    """Сериализация в JSON так же, как это делает JSONResponse"""
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    """Сильный ETag по содержимому"""
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def make_resource(body: bytes) -> Resource:
+    return Resource(body, make_etag(body))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверка заголовка If-None-Match (слабое сравнение, как требует RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Выбор сжатия по Accept-Encoding среди доступных (None - без сжатия)"""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[name.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def cached_response(
+    request: Request,
+    resource: Resource,
+    media_type: str = "application/json",
+    cache_control: str = API_CACHE_CONTROL,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """Ответ с ETag/Cache-Control; 304 без тела, если у клиента актуальная версия"""
+    headers = {**(headers or {}), "ETag": resource.etag, "Cache-Control": cache_control}
+    if etag_matches(request.headers.get("if-none-match"), resource.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=resource.body, media_type=media_type, headers=headers)
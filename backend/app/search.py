@@ -0,0 +1,70 @@
+from bisect import bisect_left
+from typing import Dict, List
+from .group_index import GroupIndex
+from .responses import dumps
+
+# Сколько групп возвращать по умолчанию и максимум
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+
+# Варианты прочтения латиницы: транслитерация ("m8o-102b"), похожие по
+# начертанию буквы ("M8O" с латинскими M и O) и набор в английской раскладке ("v8j")
+_TRANSLIT = str.maketrans("abvgdezijklmnoprstufhcywxq", "абвгдезийклмнопрстуфхцывхк")
+_LOOKALIKE = str.maketrans("aceopxykmthb", "асеорхукмтнв")
+_LAYOUT = str.maketrans(
+    "qwertyuiop[]asdfghjkl;'zxcvbnm,.`",
+    "йцукенгшщзхъфывапролджэячсмитьбюё",
+)
+
+
+def _clean(value: str) -> str:
+    """Только буквы и цифры в нижнем регистре: "М8О-102Б-24" -> "м8о102б24" """
+    return "".join(ch for ch in value.casefold().replace("ё", "е") if ch.isalnum())
+
+
+def query_variants(query: str) -> List[str]:
+    """Нормализованные варианты запроса без повторов"""
+    folded = query.casefold()
+    variants = []
+    for table in (None, _TRANSLIT, _LOOKALIKE, _LAYOUT):
+        variant = _clean(folded.translate(table) if table else folded)
+        if variant and variant not in variants:
+            variants.append(variant)
+    return variants
+
+
+class GroupSearchIndex:
+    """Префиксный индекс по id и названиям групп: отсортированные ключи и bisect"""
+
+    __slots__ = ("_keys", "_group_ids", "_encoded")
+
+    def __init__(self, index: GroupIndex):
+        entries = set()
+        encoded: Dict[str, bytes] = {}
+        for record in index:
+            group = record.group
+            for text in (group["id"], group["name"]):
+                entries.add((_clean(text), group["id"]))
+            encoded[group["id"]] = dumps({**group, "institute": record.institute_id})
+        ordered = sorted(entries)
+        self._keys = [key for key, _ in ordered]
+        self._group_ids = [group_id for _, group_id in ordered]
+        self._encoded = encoded
+
+    def search(self, query: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        """id групп, чьи id или названия начинаются с запроса (в любом из вариантов)"""
+        found: List[str] = []
+        for prefix in query_variants(query):
+            position = bisect_left(self._keys, prefix)
+            while position < len(self._keys) and self._keys[position].startswith(prefix):
+                group_id = self._group_ids[position]
+                if group_id not in found:
+                    found.append(group_id)
+                    if len(found) >= limit:
+                        return found
+                position += 1
+        return found
+
+    def search_json(self, query: str, limit: int = SEARCH_LIMIT) -> bytes:
+        """Результат поиска, собранный из заранее сериализованных записей"""
+        return b"[" + b",".join(self._encoded[group_id] for group_id in self.search(query, limit)) + b"]"
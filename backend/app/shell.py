@@ -0,0 +1,78 @@
+import gzip
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+from fastapi import Request
+from fastapi.responses import Response
+from .responses import Resource, cached_response, choose_encoding, make_resource
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# HTML всегда перепроверяется, а неизменившаяся страница отдается как 304
+SHELL_CACHE_CONTROL = "no-cache"
+# Как часто (в секундах) сверять mtime файла
+STAT_INTERVAL = 1.0
+
+
+def encode_variants(raw: bytes) -> Dict[Optional[str], Resource]:
+    """Исходный файл и его заранее сжатые варианты"""
+    variants = {None: make_resource(raw), "gzip": make_resource(gzip.compress(raw, 9, mtime=0))}
+    if brotli is not None:
+        variants["br"] = make_resource(brotli.compress(raw, quality=11))
+    return variants
+
+
+def variant_response(
+    request: Request,
+    variants: Dict[Optional[str], Resource],
+    media_type: str,
+    cache_control: str,
+) -> Response:
+    """Ответ в сжатии, выбранном по Accept-Encoding, с ETag и 304"""
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding"),
+        [name for name in ("br", "gzip") if name in variants],
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return cached_response(request, variants[encoding], media_type=media_type, cache_control=cache_control, headers=headers)
+
+
+class PageShell:
+    """HTML-оболочка SPA в памяти; перечитывается только при изменении mtime.
+
+    transform применяется к файлу перед сжатием (например, подстановка хешированных URL).
+    """
+
+    def __init__(self, path: str, stat_interval: float = STAT_INTERVAL, transform: Optional[Callable[[bytes], bytes]] = None):
+        self.path = path
+        self.stat_interval = stat_interval
+        self.transform = transform
+        self._lock = threading.Lock()
+        self._mtime_ns = None
+        self._checked_at = 0.0
+        self._variants: Dict[Optional[str], Resource] = {}
+
+    def variants(self) -> Dict[Optional[str], Resource]:
+        now = time.monotonic()
+        if now - self._checked_at >= self.stat_interval:
+            with self._lock:
+                if now - self._checked_at >= self.stat_interval:
+                    mtime_ns = os.stat(self.path).st_mtime_ns
+                    if mtime_ns != self._mtime_ns:
+                        with open(self.path, "rb") as f:
+                            raw = f.read()
+                        if self.transform is not None:
+                            raw = self.transform(raw)
+                        self._variants = encode_variants(raw)
+                        self._mtime_ns = mtime_ns
+                    self._checked_at = now
+        return self._variants
+
+    def response(self, request: Request) -> Response:
+        return variant_response(request, self.variants(), "text/html", SHELL_CACHE_CONTROL)
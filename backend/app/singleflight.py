@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Время загрузки начального значения: оно устарело при любом сроке свежести и времени работы хоста
+SEEDED = float("-inf")
+
+
+class SingleFlight(Generic[T]):
+    """Объединение одновременных запросов: на ключ выполняется одна загрузка, остальные ждут ее"""
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            # Загрузка идет в своей задаче: отмена того, кто ее начал, не отменяет остальных
+            task = asyncio.create_task(loader())
+            self._inflight[key] = task
+            self.executions += 1
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # shield: отмена одного ожидающего, в том числе первого, не отменяет общую загрузку
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Исключение уже передано ожидающим; если их нет, не выводим предупреждение
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+        }
+
+
+class StaleWhileRevalidate(Generic[T]):
+    """Кэш со сроком свежести: устаревшее значение отдается сразу, а обновление идет в фоне.
+
+    Промахи и фоновые обновления проходят через SingleFlight, так что на ключ
+    одновременно выполняется не больше одной загрузки.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.flight: SingleFlight[T] = SingleFlight()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._entries: Dict[Hashable, Tuple[T, float]] = {}
+        self._background: set = set()
+
+    def seed(self, key: Hashable, value: T) -> None:
+        """Начальное значение, сразу устаревшее. Прежнее начальное значение заменяется
+        (например, после подмены хранилища), загруженное - нет"""
+        entry = self._entries.get(key)
+        if entry is None or entry[1] == SEEDED:
+            self._entries[key] = (value, SEEDED)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await loader()
+        except Exception:
+            self.errors += 1
+            raise
+        self._entries[key] = (value, time.monotonic())
+        return value
+
+    def _revalidate(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> None:
+        if self.flight.in_flight(key):
+            self.flight.coalesced += 1
+            return
+        task = asyncio.create_task(self.flight.do(key, lambda: self._load(key, loader)))
+        self._background.add(task)
+        task.add_done_callback(self._revalidated)
+
+    def _revalidated(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Фоновое обновление не удалось: %s", task.exception())
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        entry: Optional[Tuple[T, float]] = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return await self.flight.do(key, lambda: self._load(key, loader))
+        value, fetched_at = entry
+        if time.monotonic() - fetched_at < self.ttl:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+            self._revalidate(key, loader)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            **{f"flight_{name}": value for name, value in self.flight.stats().items()},
+        }
@@ -0,0 +1,189 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from .compact import CompactSchedules
+from .group_index import GroupIndex
+from .responses import Resource
+from .store import ScheduleStore
+
+# Формат файла:
+#   MAGIC | длина заголовка (uint32 LE) | заголовок JSON | выравнивание | данные
+# В заголовке для каждого ответа хранится [смещение, длина, etag] относительно
+# начала данных. Данные начинаются с массива записей CompactSchedules (его таблицы
+# строк и диапазоны групп лежат в заголовке), за ним подряд готовые JSON-тела.
+MAGIC = b"MAISNAP4"
+_HEADER_LENGTH = struct.Struct("<I")
+# Данные выровнены, чтобы массив записей читался прямо из mmap через memoryview
+_ALIGN = 8
+
+
+def _data_offset(header_end: int) -> int:
+    return -(-header_end // _ALIGN) * _ALIGN
+
+
+class MappedResources(Mapping):
+    """Ответы, читаемые из отображенного в память файла по индексу.
+
+    Страницы файла общие для всех процессов, которые его открыли; байты тела
+    копируются только при обращении к конкретному ключу.
+    """
+
+    def __init__(self, buffer: mmap.mmap, data_offset: int, index: Dict[str, List]):
+        self._buffer = buffer
+        self._data_offset = data_offset
+        self._index = index
+
+    def __getitem__(self, key: str) -> Resource:
+        offset, length, etag = self._index[key]
+        start = self._data_offset + offset
+        return Resource(self._buffer[start:start + length], etag)
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+class _GroupListResources(Mapping):
+    """Списки групп по ключу (институт, курс) поверх MappedResources"""
+
+    def __init__(self, resources: MappedResources):
+        self._resources = resources
+
+    @staticmethod
+    def _encode(key: Tuple[str, Optional[str]]) -> str:
+        institute_id, course = key
+        return f"{institute_id}/{course or ''}"
+
+    @staticmethod
+    def _decode(key: str) -> Tuple[str, Optional[str]]:
+        institute_id, _, course = key.partition("/")
+        return institute_id, course or None
+
+    def __getitem__(self, key: Tuple[str, Optional[str]]) -> Resource:
+        return self._resources[self._encode(key)]
+
+    def __contains__(self, key) -> bool:
+        return self._encode(key) in self._resources
+
+    def __iter__(self):
+        return (self._decode(key) for key in self._resources)
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+
+def write_snapshot(store: ScheduleStore, path: str) -> None:
+    """Сохраняет хранилище в файл снимка (атомарно через os.replace)"""
+    chunks = []
+    offset = 0
+
+    def add(resource: Resource) -> List:
+        nonlocal offset
+        entry = [offset, len(resource.body), resource.etag]
+        chunks.append(resource.body)
+        offset += len(resource.body)
+        return entry
+
+    # Записи первыми: смещение 0 от выровненного начала данных
+    records = add(Resource(store.compact.records.tobytes(), ""))
+    header = {
+        "version": store.version,
+        "epoch": store.epoch,
+        "built_at": store.built_at,
+        "institutes": add(store.get_institutes()),
+        "groups": {_GroupListResources._encode(key): add(resource) for key, resource in store.groups.items()},
+        "institute_list": store.index.institutes,
+        "group_tree": store.index.tree,
+        "schedules": {group_id: add(resource) for group_id, resource in store.schedules.items()},
+        "compact": {
+            "byteorder": sys.byteorder,
+            "tables": {field: table.strings for field, table in store.compact.tables.items()},
+            "records": records,
+            "ranges": store.compact.ranges,
+        },
+    }
+    # Размер данных: по нему при загрузке отличается обрезанный файл
+    header["size"] = offset
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        header_end = len(MAGIC) + _HEADER_LENGTH.size + len(header_bytes)
+        f.write(bytes(_data_offset(header_end) - header_end))
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str) -> ScheduleStore:
+    """Открывает снимок через mmap; тела ответов и массив записей остаются в разделяемых страницах"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if buffer[:len(MAGIC)] != MAGIC:
+        buffer.close()
+        raise ValueError(f"{path}: не является снимком расписания")
+    header_start = len(MAGIC) + _HEADER_LENGTH.size
+    try:
+        (header_length,) = _HEADER_LENGTH.unpack_from(buffer, len(MAGIC))
+        header = json.loads(buffer[header_start:header_start + header_length])
+    except (struct.error, ValueError) as e:
+        buffer.close()
+        raise ValueError(f"{path}: поврежден заголовок снимка") from e
+    data_offset = _data_offset(header_start + header_length)
+    if not isinstance(header, dict) or len(buffer) != data_offset + header.get("size", -1):
+        buffer.close()
+        raise ValueError(f"{path}: снимок обрезан или поврежден")
+
+    institutes_offset, institutes_length, institutes_etag = header["institutes"]
+    start = data_offset + institutes_offset
+
+    compact_header = header["compact"]
+    records_offset, records_length, _ = compact_header["records"]
+    raw = memoryview(buffer)[data_offset + records_offset:data_offset + records_offset + records_length]
+    if compact_header["byteorder"] == sys.byteorder:
+        # Без копии: записи читаются прямо из общих страниц файла
+        records = raw.cast("I")
+    else:
+        records = array("I")
+        records.frombytes(raw)
+        records.byteswap()
+    compact = CompactSchedules.from_parts(compact_header["tables"], records, compact_header["ranges"])
+
+    return ScheduleStore(
+        GroupIndex(header["institute_list"], header["group_tree"]),
+        compact,
+        Resource(buffer[start:start + institutes_length], institutes_etag),
+        _GroupListResources(MappedResources(buffer, data_offset, header["groups"])),
+        MappedResources(buffer, data_offset, header["schedules"]),
+        version=header["version"],
+        epoch=header["epoch"],
+        built_at=header["built_at"],
+    )
+
+
+def main():
+    """Собирает снимок из текущих данных: python -m app.snapshot путь"""
+    import argparse
+    from .store import build_store
+
+    parser = argparse.ArgumentParser(description="Сборка снимка расписаний")
+    parser.add_argument("path")
+    args = parser.parse_args()
+    write_snapshot(build_store(), args.path)
+    print(f"{args.path}: {os.path.getsize(args.path)} байт")
+
+
+if __name__ == "__main__":
+    main()
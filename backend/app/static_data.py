@@ -1,3 +1,5 @@
+import re
+
 INSTITUTES = [
     {"id": "1", "name": "Институт №1 (Авиационная техника)"},
     {"id": "2", "name": "Институт №2 (Авиационные системы)"},
@@ -159,15 +161,18 @@ GROUPS = {}
 for i in range(1, 15):  # Для институтов с 1 по 14
     GROUPS[str(i)] = generate_groups_for_institute(str(i))
 
+GROUP_INSTITUTE_RE = re.compile(r'м(\d+)о-')
+GROUP_NUMBER_RE = re.compile(r'-(\d+)б-')
+
 def get_schedule(group_id):
     """Возвращает статическое расписание для группы, зависящее от номера института и группы"""
-    # Получаем номер института из ID группы (первая цифра после буквы м)
-    institute_number = group_id[1:2]
+    # Получаем номер института из ID группы (все цифры после буквы м, например "8" или "12")
+    match = GROUP_INSTITUTE_RE.match(group_id)
+    institute_number = match.group(1) if match else group_id[1:2]
     
     # Получаем номер группы из ID (цифры после первого дефиса и до второго дефиса)
     # Например, из "м8о-102б-24" получаем "102"
-    import re
-    match = re.search(r'-(\d+)б-', group_id)
+    match = GROUP_NUMBER_RE.search(group_id)
     group_number = match.group(1) if match else "101"
     
     # Получаем курс по первой цифре номера группы
@@ -248,7 +253,15 @@ def get_schedule(group_id):
                     "time": "13:00 - 14:30",
                     "name": "Физика (лабораторная)",
                     "teacher": "Оптиков О.О.",
-                    "room": "ГУК Б-315"
+                    "room": "ГУК Б-315",
+                    "week": "odd"
+                },
+                {
+                    "time": "13:00 - 14:30",
+                    "name": "Информатика (лабораторная)",
+                    "teacher": "Сидоров И.И.",
+                    "room": "ИТ-404",
+                    "week": "even"
                 }
             ],
             "friday": [
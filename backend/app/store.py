@@ -0,0 +1,177 @@
+import hashlib
+import os
+import time
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+from .responses import Resource, dumps, make_resource
+from .lookup import ReverseIndex
+from .compact import CompactSchedules
+from .search import GroupSearchIndex
+from .group_index import GroupIndex
+
+
+class ScheduleStore:
+    """Неизменяемое хранилище заранее сериализованных ответов API"""
+
+    __slots__ = ("version", "epoch", "built_at", "index", "compact", "_lookup", "_search", "_institutes", "_groups", "_schedules")
+
+    def __init__(
+        self,
+        index: GroupIndex,
+        compact: CompactSchedules,
+        institutes: Resource,
+        groups: Mapping[Tuple[str, Optional[str]], Resource],
+        schedules: Mapping[str, Resource],
+        version: int = 1,
+        lookup: Optional[ReverseIndex] = None,
+        epoch: str = "",
+        built_at: int = 0,
+    ):
+        self.version = version
+        # Линия данных: версии сравнимы только внутри одной эпохи (один обходчик, один снимок)
+        self.epoch = epoch
+        # Время данных (unix-секунды): одинаково у всех воркеров, загрузивших один снимок
+        self.built_at = built_at
+        self.index = index
+        # Структурированные расписания для индексов и производных представлений.
+        # Хранятся рядом с готовыми телами, а не вместо них (см. benchmarks/bench_memory)
+        self.compact = compact
+        # Обратные индексы и поиск строятся при первом обращении (см. prepare)
+        self._lookup = lookup
+        self._search: Optional[GroupSearchIndex] = None
+        self._institutes = institutes
+        # Отображения не копируются: они могут быть лениво читаемым снимком на диске
+        self._groups = MappingProxyType(groups)
+        self._schedules = MappingProxyType(schedules)
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    @property
+    def token(self) -> str:
+        """Версия для клиентов: «эпоха.номер», номера разных эпох не сравниваются"""
+        return f"{self.epoch}.{self.version}"
+
+    @property
+    def lookup(self) -> ReverseIndex:
+        # Гонка двух потоков безопасна: оба построят одинаковый индекс
+        if self._lookup is None:
+            self._lookup = ReverseIndex(self.compact.items())
+        return self._lookup
+
+    @property
+    def search(self) -> GroupSearchIndex:
+        if self._search is None:
+            self._search = GroupSearchIndex(self.index)
+        return self._search
+
+    def prepare(self) -> "ScheduleStore":
+        """Построить ленивые индексы заранее, например в потоке до подмены хранилища"""
+        self.lookup
+        self.search
+        return self
+
+    def __contains__(self, group_id: str) -> bool:
+        return group_id in self._schedules
+
+    def group_ids(self) -> List[str]:
+        return list(self._schedules)
+
+    @property
+    def groups(self) -> Mapping[Tuple[str, Optional[str]], Resource]:
+        return self._groups
+
+    @property
+    def schedules(self) -> Mapping[str, Resource]:
+        return self._schedules
+
+    def get_institutes(self) -> Resource:
+        return self._institutes
+
+    def get_groups(self, institute_id: str, course: Optional[str] = None) -> Optional[Resource]:
+        """Список групп института (весь или одного курса)"""
+        return self._groups.get((institute_id, course))
+
+    def get_schedule(self, group_id: str) -> Optional[Resource]:
+        """Готовый JSON расписания группы или None"""
+        return self._schedules.get(group_id)
+
+
+# Эпоха хранилища, собранного из статических данных, а не из обхода сайта
+STATIC_EPOCH_PREFIX = "static-"
+
+
+def build_store(
+    institutes: Optional[List[Dict[str, str]]] = None,
+    groups: Optional[Dict[str, Dict[str, List[Dict]]]] = None,
+    schedule_func: Optional[Callable[[str], Dict]] = None,
+    version: int = 1,
+    epoch: Optional[str] = None,
+    built_at: Optional[int] = None,
+) -> ScheduleStore:
+    """Строит хранилище: каждый ответ генерируется и сериализуется один раз.
+
+    Без аргументов берутся статические данные; static_data импортируется только здесь,
+    поэтому при загрузке из снимка GROUPS не строится вовсе. Без epoch эпоха выводится
+    из содержимого, так что воркеры с одинаковыми данными получают одну и ту же.
+    """
+    if institutes is None or groups is None or schedule_func is None:
+        from . import static_data
+        institutes = static_data.INSTITUTES if institutes is None else institutes
+        groups = static_data.GROUPS if groups is None else groups
+        schedule_func = static_data.get_schedule if schedule_func is None else schedule_func
+        if built_at is None:
+            built_at = int(os.path.getmtime(static_data.__file__))
+    index = GroupIndex(institutes, groups)
+    group_lists = {}
+    for institute_id, courses in groups.items():
+        for course, course_groups in courses.items():
+            group_lists[(institute_id, course)] = make_resource(dumps(course_groups))
+        group_lists[(institute_id, None)] = make_resource(dumps(index.institute_groups(institute_id)))
+    raw_schedules = {record.group["id"]: schedule_func(record.group["id"]) for record in index}
+    schedules = {group_id: make_resource(dumps(schedule)) for group_id, schedule in raw_schedules.items()}
+    institutes_resource = make_resource(dumps(institutes))
+    if epoch is None:
+        digest = hashlib.blake2b(digest_size=8)
+        for resource in (institutes_resource, *group_lists.values(), *schedules.values()):
+            digest.update(resource.etag.encode("ascii"))
+        epoch = STATIC_EPOCH_PREFIX + digest.hexdigest()
+    return ScheduleStore(
+        index,
+        CompactSchedules.from_schedules(raw_schedules.items()),
+        institutes_resource,
+        group_lists,
+        schedules,
+        version=version,
+        epoch=epoch,
+        built_at=int(time.time()) if built_at is None else built_at,
+    )
+
+
+# Путь к снимку хранилища на диске; если файл есть, данные берутся из него
+SNAPSHOT_PATH = os.environ.get("SCHEDULE_SNAPSHOT")
+
+_store: Optional[ScheduleStore] = None
+
+
+def get_store() -> ScheduleStore:
+    """Текущее хранилище (загружается из снимка или строится при первом обращении)"""
+    global _store
+    if _store is None:
+        if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH):
+            from .snapshot import load_snapshot
+            _store = load_snapshot(SNAPSHOT_PATH)
+        else:
+            _store = build_store()
+    return _store
+
+
+def swap_store(store: ScheduleStore) -> ScheduleStore:
+    """Атомарная подмена текущего хранилища; возвращает предыдущее.
+
+    Обработчики берут get_store() один раз за запрос, поэтому запрос,
+    начавшийся до подмены, дорабатывает на старых данных целиком.
+    """
+    global _store
+    previous, _store = _store, store
+    return previous
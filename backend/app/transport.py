@@ -0,0 +1,256 @@
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+import aiohttp
+
+CORPUS_FORMAT = "mai-corpus/1"
+# Заголовки ответа, которые сохраняются в корпус (нужны условным запросам)
+KEPT_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+
+
+class TransportResponse(NamedTuple):
+    """Ответ сервера, уже прочитанный целиком"""
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+    encoding: str
+
+
+def corpus_key(params: Optional[Dict[str, str]]) -> str:
+    """Ключ запроса в корпусе: отсортированные параметры, без адреса сайта"""
+    return urlencode(sorted((params or {}).items()))
+
+
+class HttpTransport:
+    """Обычные запросы к сайту через aiohttp"""
+
+    def __init__(self, concurrency: int = 16, limit_per_host: int = 8, timeout: Optional[aiohttp.ClientTimeout] = None):
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self) -> None:
+        connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=30,
+        )
+        self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def close(self) -> None:
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def get(self, url: str, params: Optional[Dict[str, str]], headers: Optional[Dict[str, str]]) -> TransportResponse:
+        async with self.session.get(url, params=params, headers=headers) as response:
+            body = await response.read()
+            encoding = response.get_encoding() if body else "utf-8"
+            return TransportResponse(response.status, response.headers, body, encoding)
+
+
+class Corpus:
+    """Записанные ответы сайта: gzip с JSON-строкой на каждый запрос"""
+
+    def __init__(self, entries: Optional[Dict[str, Tuple[int, Dict[str, str], str]]] = None, base_url: Optional[str] = None):
+        self.entries = entries if entries is not None else {}
+        self.base_url = base_url
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def load(cls, path: str) -> "Corpus":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != CORPUS_FORMAT:
+                raise ValueError(f"{path}: неизвестный формат корпуса {header.get('format')!r}")
+            entries = {}
+            for line in f:
+                item = json.loads(line)
+                entries[item["key"]] = (item["status"], item["headers"], item["body"])
+        return cls(entries, header.get("base_url"))
+
+    def save(self, path: str) -> None:
+        """Атомарная запись; ключи по порядку, чтобы одинаковые данные давали одинаковый файл"""
+        tmp = f"{path}.tmp"
+        # mtime=0: содержимое файла не зависит от времени записи
+        with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as compressed:
+            compressed.write(json.dumps({"format": CORPUS_FORMAT, "base_url": self.base_url}).encode("utf-8") + b"\n")
+            for key in sorted(self.entries):
+                status, headers, body = self.entries[key]
+                item = {"key": key, "status": status, "headers": headers, "body": body}
+                compressed.write(json.dumps(item, ensure_ascii=False).encode("utf-8") + b"\n")
+        os.replace(tmp, path)
+
+    def record(self, params: Optional[Dict[str, str]], response: TransportResponse) -> None:
+        # 304 не несет тела, ошибки не воспроизводимы: в корпус идут только полные ответы
+        if response.status != 200:
+            return
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        self.entries[corpus_key(params)] = (200, headers, response.body.decode(response.encoding, errors="replace"))
+
+    def lookup(self, params: Optional[Dict[str, str]]) -> Optional[Tuple[int, Dict[str, str], str]]:
+        return self.entries.get(corpus_key(params))
+
+
+class RecordingTransport:
+    """Обертка над транспортом: каждый успешный ответ попадает в корпус"""
+
+    def __init__(self, inner, corpus: Corpus):
+        self.inner = inner
+        self.corpus = corpus
+
+    async def open(self) -> None:
+        await self.inner.open()
+
+    async def close(self) -> None:
+        await self.inner.close()
+
+    async def get(self, url: str, params: Optional[Dict[str, str]], headers: Optional[Dict[str, str]]) -> TransportResponse:
+        if self.corpus.base_url is None:
+            self.corpus.base_url = url
+        # Без условных заголовков: в корпус нужен полный ответ, а не 304
+        response = await self.inner.get(url, params, None)
+        self.corpus.record(params, response)
+        if headers and response.status == 200 and headers.get("If-None-Match") == response.headers.get("ETag"):
+            return TransportResponse(304, response.headers, b"", response.encoding)
+        return response
+
+
+class Faults:
+    """Внесенные задержка и ошибки; seed делает последовательность ошибок повторяемой"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    async def delay(self) -> None:
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def error(self) -> Optional[str]:
+        """None или вид ошибки: 'status' (503), 'timeout' или 'connection'"""
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._random.choice(("status", "timeout", "connection"))
+        return None
+
+
+def _replay(corpus: Corpus, params: Optional[Dict[str, str]], headers: Optional[Mapping[str, str]]) -> Tuple[int, Dict[str, str], bytes]:
+    entry = corpus.lookup(params)
+    if entry is None:
+        return 404, {}, b""
+    status, recorded, body = entry
+    if headers and recorded.get("ETag") and headers.get("If-None-Match") == recorded["ETag"]:
+        return 304, {"ETag": recorded["ETag"]}, b""
+    return status, recorded, body.encode("utf-8")
+
+
+class ReplayTransport:
+    """Ответы из корпуса прямо в процессе, без сети"""
+
+    def __init__(self, corpus: Corpus, faults: Optional[Faults] = None):
+        self.corpus = corpus
+        self.faults = faults or Faults()
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def get(self, url: str, params: Optional[Dict[str, str]], headers: Optional[Dict[str, str]]) -> TransportResponse:
+        await self.faults.delay()
+        error = self.faults.error()
+        if error == "timeout":
+            raise asyncio.TimeoutError()
+        if error == "connection":
+            raise aiohttp.ClientConnectionError("внесенная ошибка соединения")
+        if error == "status":
+            return TransportResponse(503, {}, b"", "utf-8")
+        status, response_headers, body = _replay(self.corpus, params, headers)
+        return TransportResponse(status, response_headers, body, "utf-8")
+
+
+def make_replay_app(corpus: Corpus, faults: Optional[Faults] = None):
+    """Локальный сервер вместо сайта: отвечает из корпуса с задержкой и ошибками"""
+    from aiohttp import web
+
+    faults = faults or Faults()
+
+    async def handle(request: web.Request) -> web.Response:
+        await faults.delay()
+        error = faults.error()
+        if error == "timeout":
+            # Клиент не дождется ответа и сам оборвет запрос по таймауту
+            await asyncio.sleep(3600)
+        if error == "connection":
+            request.transport.close()
+            return web.Response(status=503)
+        if error == "status":
+            return web.Response(status=503)
+        status, headers, body = _replay(corpus, dict(request.rel_url.query), request.headers)
+        headers = dict(headers)
+        content_type = headers.pop("Content-Type", "text/html; charset=utf-8")
+        return web.Response(status=status, body=body or None, headers={**headers, "Content-Type": content_type})
+
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", handle)
+    return app
+
+
+async def record_crawl(base_url: str, path: str, **parser_options) -> Corpus:
+    """Полный обход сайта с записью всех ответов в корпус"""
+    from .crawler import crawl
+    from .parser import MAIParser
+
+    corpus = Corpus(base_url=base_url)
+    parser = MAIParser(base_url=base_url, **parser_options)
+    parser.transport = RecordingTransport(parser.transport, corpus)
+    async with parser:
+        await crawl(parser)
+    corpus.save(path)
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись и воспроизведение ответов сайта расписания")
+    commands = parser.add_subparsers(dest="command", required=True)
+    record = commands.add_parser("record", help="обойти сайт и записать ответы")
+    record.add_argument("corpus")
+    record.add_argument("--url", default=None, help="адрес groups.php (по умолчанию сайт МАИ)")
+    serve = commands.add_parser("serve", help="отдавать записанные ответы по HTTP")
+    serve.add_argument("corpus")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8081)
+    serve.add_argument("--latency", type=float, default=0.0, help="задержка ответа, секунды")
+    serve.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, секунды")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой")
+    serve.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        from .parser import MAIParser
+
+        corpus = asyncio.run(record_crawl(args.url or MAIParser.BASE_URL, args.corpus))
+        print(f"{args.corpus}: {len(corpus)} ответов")
+    else:
+        from aiohttp import web
+
+        corpus = Corpus.load(args.corpus)
+        faults = Faults(args.latency, args.jitter, args.error_rate, args.seed)
+        web.run_app(make_replay_app(corpus, faults), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+from .lookup import DAYS
+from .responses import Resource, dumps, make_resource
+from .store import ScheduleStore
+
+# Часовой пояс, по которому наступает «сегодня» и сменяется кэш
+TIMEZONE = ZoneInfo(os.environ.get("SCHEDULE_TIMEZONE", "Europe/Moscow"))
+# Начало семестра (ISO-дата); по умолчанию 1 сентября или 1 февраля
+SEMESTER_START = os.environ.get("SEMESTER_START")
+
+
+def today() -> date:
+    return datetime.now(TIMEZONE).date()
+
+
+def semester_start(day: date) -> date:
+    """Понедельник недели, с которой начинается семестр, содержащий day"""
+    if SEMESTER_START:
+        start = date.fromisoformat(SEMESTER_START)
+    elif day.month >= 9:
+        start = date(day.year, 9, 1)
+    elif day.month >= 2:
+        start = date(day.year, 2, 1)
+    else:
+        start = date(day.year - 1, 9, 1)
+    return start - timedelta(days=start.weekday())
+
+
+def week_number(day: date) -> int:
+    """Номер учебной недели (с 1); первая неделя - та, где начинается семестр"""
+    return (day - semester_start(day)).days // 7 + 1
+
+
+def week_parity(day: date) -> str:
+    return "odd" if week_number(day) % 2 else "even"
+
+
+def week_dates(number: int, reference: date) -> List[date]:
+    """Даты с понедельника по воскресенье учебной недели number семестра reference"""
+    monday = semester_start(reference) + timedelta(weeks=number - 1)
+    return [monday + timedelta(days=offset) for offset in range(7)]
+
+
+def day_view(store: ScheduleStore, group_id: str, day: date) -> Dict:
+    """Занятия группы в конкретную дату с учетом четности недели и границ дат"""
+    parity = week_parity(day)
+    compact = store.compact
+    return {
+        "date": day.isoformat(),
+        "weekday": DAYS[day.weekday()],
+        "week": week_number(day),
+        "parity": parity,
+        "lessons": [
+            compact.lesson_dict(lesson)
+            for lesson in compact.lessons(group_id)
+            if lesson.occurs_on(day, parity)
+        ],
+    }
+
+
+class DateViews:
+    """Готовые представления на текущую и следующую неделю.
+
+    Для группы все 14 дней считаются при первом обращении за сутки; кэш
+    сбрасывается с наступлением нового дня или при смене версии хранилища.
+    """
+
+    def __init__(self):
+        self._day: Optional[date] = None
+        # Версия вместе с эпохой (ScheduleStore.token): номера разных эпох совпадают
+        self._version: Optional[str] = None
+        self._days: Dict[str, Dict[date, Dict]] = {}
+        self._today: Dict[str, Resource] = {}
+        self._weeks: Dict[tuple, Resource] = {}
+
+    def _roll(self, store: ScheduleStore) -> date:
+        current = today()
+        if current != self._day or store.token != self._version:
+            self._day = current
+            self._version = store.token
+            self._days = {}
+            self._today = {}
+            self._weeks = {}
+        return current
+
+    def _fortnight(self, store: ScheduleStore, group_id: str, current: date) -> Dict[date, Dict]:
+        views = self._days.get(group_id)
+        if views is None:
+            number = week_number(current)
+            dates = week_dates(number, current) + week_dates(number + 1, current)
+            views = {day: day_view(store, group_id, day) for day in dates}
+            self._days[group_id] = views
+        return views
+
+    def today(self, store: ScheduleStore, group_id: str) -> Resource:
+        current = self._roll(store)
+        resource = self._today.get(group_id)
+        if resource is None:
+            resource = make_resource(dumps(self._fortnight(store, group_id, current)[current]))
+            self._today[group_id] = resource
+        return resource
+
+    def week(self, store: ScheduleStore, group_id: str, number: int) -> Resource:
+        """Неделя number: текущая и следующая берутся из кэша, остальные считаются заново"""
+        current = self._roll(store)
+        key = (group_id, number)
+        resource = self._weeks.get(key)
+        if resource is not None:
+            return resource
+        dates = week_dates(number, current)
+        if number in (week_number(current), week_number(current) + 1):
+            views = self._fortnight(store, group_id, current)
+            resource = make_resource(dumps([views[day] for day in dates]))
+            self._weeks[key] = resource
+        else:
+            resource = make_resource(dumps([day_view(store, group_id, day) for day in dates]))
+        return resource
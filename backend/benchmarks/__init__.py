@@ -0,0 +1 @@
+# Бенчмарки backend: запуск из каталога backend, например `python -m benchmarks.bench_store`
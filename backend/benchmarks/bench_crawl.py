@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+from typing import Optional
+from app.crawl_state import CrawlState
+from app.crawler import crawl
+from app.parser import DEFAULT_PARSER_BACKEND, MAIParser
+from app.transport import Corpus, Faults, ReplayTransport
+from . import stub_server
+
+
+async def run(base_url: str, args, parse_workers: int, state: Optional[CrawlState] = None, corpus: Optional[Corpus] = None) -> dict:
+    # С корпусом страницы отдаются прямо в процессе: ни заглушки, ни сокетов
+    transport = ReplayTransport(corpus, Faults(args.latency, args.jitter, args.error_rate, args.seed)) if corpus else None
+    async with MAIParser(
+        base_url=base_url,
+        concurrency=args.concurrency,
+        limit_per_host=args.limit_per_host,
+        parser_backend=args.parser_backend,
+        parse_workers=parse_workers,
+        state=state,
+        transport=transport,
+    ) as parser:
+        result = await crawl(parser, incremental=state is not None)
+    if state is not None:
+        state.commit()
+    return {
+        "parse_workers": parse_workers,
+        "incremental": state is not None,
+        "institutes": len(result.institutes),
+        "groups": sum(len(groups) for courses in result.groups.values() for groups in courses.values()),
+        "schedules": len(result.schedules),
+        "unchanged_groups": len(result.unchanged),
+        "failed": len(result.failed),
+        **result.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность полного обхода против локальной заглушки")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--limit-per-host", type=int, default=8)
+    parser.add_argument("--parser-backend", default=DEFAULT_PARSER_BACKEND)
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        nargs="+",
+        default=[0],
+        help="размеры пула процессов для разбора (0 - разбор в цикле событий)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="дважды обойти с сохранением валидаторов: второй проход условными запросами",
+    )
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--replay", metavar="CORPUS", help="обходить записанный корпус (python -m app.transport record) вместо заглушки")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа при --replay, секунды")
+    parser.add_argument("--jitter", type=float, default=0.0, help="случайная добавка к задержке, секунды")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой при --replay")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = Corpus.load(args.replay) if args.replay else None
+    process = None
+    if corpus is not None:
+        base_url = corpus.base_url or MAIParser.BASE_URL
+    else:
+        process, base_url = stub_server.start_process(port=args.port)
+    try:
+        for workers in args.parse_workers:
+            state = CrawlState() if args.incremental else None
+            print(json.dumps(asyncio.run(run(base_url, args, workers, state, corpus)), ensure_ascii=False))
+            if state is not None:
+                print(json.dumps(asyncio.run(run(base_url, args, workers, state, corpus)), ensure_ascii=False))
+    finally:
+        if process is not None:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
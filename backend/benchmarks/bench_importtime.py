@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+from .common import BACKEND_DIR, add_report_arguments, report
+
+# Импорт приложения и обработчики startup, как в воркере uvicorn перед первым запросом
+WORKER = r"""
+import asyncio, json, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def start():
+    await app.router.startup()
+    # Готовность - возврат из startup; фоновые задачи после этого не считаются
+    return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "modules": [name for name in ("aiohttp", "bs4", "lxml", "app.parser", "app.static_data") if name in sys.modules],
+}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Строки -X importtime: (модуль, собственное время, суммарное время) в микросекундах"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_worker(env: Dict[str, str]) -> Tuple[Dict, List[Tuple[str, int, int]]]:
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", WORKER],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(process.stdout.strip().splitlines()[-1]), parse_importtime(process.stderr)
+
+
+def measure_mode(env: Dict[str, str], repeat: int, top: int) -> Tuple[Dict[str, float], List[Tuple[str, int]]]:
+    """Медианы по repeat запускам и самые дорогие по собственному времени модули"""
+    runs = [run_worker(env) for _ in range(repeat)]
+    imports = [rows for _, rows in runs]
+    own_modules = [sum(self_us for name, self_us, _ in rows if name == "app" or name.startswith("app.")) for rows in imports]
+    row = {
+        "import_ms": round(statistics.median(result["import_s"] for result, _ in runs) * 1000, 1),
+        "ready_ms": round(statistics.median(result["ready_s"] for result, _ in runs) * 1000, 1),
+        "app_modules_self_ms": round(statistics.median(own_modules) / 1000, 1),
+        "modules_imported": len(imports[-1]),
+        "heavy_modules": runs[-1][0]["modules"],
+    }
+    slowest = sorted(((name, self_us) for name, self_us, _ in imports[-1]), key=lambda item: -item[1])[:top]
+    return row, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Холодный старт воркера: python -X importtime и время до готовности")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="сколько самых медленных модулей показать")
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    from app.snapshot import write_snapshot
+    from app.store import build_store
+
+    env = {key: value for key, value in os.environ.items() if key not in ("SCHEDULE_SNAPSHOT", "SCHEDULE_SOURCE_URL")}
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.snap")
+        write_snapshot(build_store(), path)
+        for mode, mode_env in (("build", env), ("snapshot", {**env, "SCHEDULE_SNAPSHOT": path})):
+            row, slowest = measure_mode(mode_env, args.repeat, args.top)
+            results[mode] = row
+            print(json.dumps({"mode": mode, **row}, ensure_ascii=False))
+            for name, self_us in slowest:
+                print(f"    {self_us / 1000:>8.1f} мс  {name}")
+    report("importtime", results, {"repeat": args.repeat}, args)
+
+
+if __name__ == "__main__":
+    main()
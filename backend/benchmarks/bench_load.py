@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import quote
+from app.static_data import GROUPS, INSTITUTES
+from .common import BACKEND_DIR, add_report_arguments, percentile, report
+
+# Доли запросов по маршрутам: оболочка страницы, списки групп и расписания
+MIX = (("/", 10), ("/api/groups/{institute}", 30), ("/api/schedule/{group}", 60))
+
+
+def build_plan(count: int, seed: int) -> List[Tuple[str, str]]:
+    """Последовательность (маршрут, путь) с фиксированным seed: одинакова от прогона к прогону"""
+    rng = random.Random(seed)
+    institutes = [institute["id"] for institute in INSTITUTES]
+    groups = [group["id"] for courses in GROUPS.values() for groups in courses.values() for group in groups]
+    routes = [route for route, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    plan = []
+    for route in rng.choices(routes, weights, k=count):
+        path = route.format(institute=rng.choice(institutes), group=rng.choice(groups))
+        plan.append((route, path))
+    return plan
+
+
+async def asgi_get(app, path: str) -> int:
+    """Один GET прямо через ASGI-интерфейс приложения, без сети и HTTP-клиента"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": quote(path).encode("ascii"),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def drive(plan: List[Tuple[str, str]], concurrency: int, request) -> Tuple[List[Tuple[str, float, int]], float]:
+    """concurrency воркеров разбирают общий план; возвращает (маршрут, секунды, статус) и общее время"""
+    samples: List[Tuple[str, float, int]] = []
+    queue = iter(plan)
+
+    async def worker():
+        for route, path in queue:
+            started = time.perf_counter()
+            try:
+                status = await request(path)
+            except Exception:
+                status = 0
+            samples.append((route, time.perf_counter() - started, status))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: List[Tuple[str, float, int]], elapsed: float) -> Dict[str, Dict[str, float]]:
+    by_route: Dict[str, List[Tuple[float, int]]] = {"all": []}
+    for route, seconds, status in samples:
+        by_route.setdefault(route, []).append((seconds, status))
+        by_route["all"].append((seconds, status))
+    results = {}
+    for route, rows in by_route.items():
+        latencies = [seconds * 1000 for seconds, _ in rows]
+        results[route] = {
+            "count": len(rows),
+            "errors": sum(1 for _, status in rows if status != 200),
+            "rps": round(len(rows) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p90_ms": round(percentile(latencies, 90), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+    return results
+
+
+async def run_asgi(plan, concurrency: int, warmup: int):
+    from app.main import app
+
+    await app.router.startup()
+    try:
+        await drive(plan[:warmup], concurrency, lambda path: asgi_get(app, path))
+        return await drive(plan, concurrency, lambda path: asgi_get(app, path))
+    finally:
+        await app.router.shutdown()
+
+
+async def run_http(base_url: str, plan, concurrency: int, warmup: int):
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, headers={"Accept-Encoding": "gzip"}) as session:
+        async def get(path: str) -> int:
+            async with session.get(base_url + path) as response:
+                await response.read()
+                return response.status
+
+        await drive(plan[:warmup], concurrency, get)
+        return await drive(plan, concurrency, get)
+
+
+def start_uvicorn(port: int) -> subprocess.Popen:
+    """uvicorn с приложением в отдельном процессе на localhost"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("uvicorn завершился при запуске")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn не начал принимать соединения")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузка на API смесью запросов: в процессе (ASGI) и через uvicorn")
+    parser.add_argument("--mode", choices=("asgi", "uvicorn", "url"), default="asgi")
+    parser.add_argument("--url", help="адрес уже запущенного сервера для --mode url")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--warmup", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8765)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    plan = build_plan(args.requests, args.seed)
+    if args.mode == "asgi":
+        samples, elapsed = asyncio.run(run_asgi(plan, args.concurrency, args.warmup))
+    elif args.mode == "uvicorn":
+        process = start_uvicorn(args.port)
+        try:
+            samples, elapsed = asyncio.run(run_http(f"http://127.0.0.1:{args.port}", plan, args.concurrency, args.warmup))
+        finally:
+            process.terminate()
+            process.wait()
+    else:
+        if not args.url:
+            parser.error("--mode url требует --url")
+        samples, elapsed = asyncio.run(run_http(args.url.rstrip("/"), plan, args.concurrency, args.warmup))
+
+    results = summarize(samples, elapsed)
+    print(f"{'route':<28}{'count':>8}{'errors':>8}{'req/s':>10}{'p50, мс':>10}{'p90, мс':>10}{'p99, мс':>10}")
+    for route, row in results.items():
+        print(
+            f"{route:<28}{row['count']:>8}{row['errors']:>8}{row['rps']:>10}"
+            f"{row['p50_ms']:>10}{row['p90_ms']:>10}{row['p99_ms']:>10}"
+        )
+    params = {key: getattr(args, key) for key in ("mode", "requests", "warmup", "concurrency", "seed")}
+    report(f"load-{args.mode}", results, params, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import argparse
+import gc
+import json
+import os
+import tempfile
+import tracemalloc
+from app.compact import CompactSchedules
+from app.responses import dumps
+from app.snapshot import load_snapshot, write_snapshot
+from app.static_data import get_schedule
+from app.store import ScheduleStore, build_store
+
+
+def synthetic_group_ids(count: int):
+    """id групп в формате МАИ по всем институтам и курсам, сколько потребуется"""
+    ids = []
+    number = 1
+    while len(ids) < count:
+        for institute in range(1, 15):
+            for course in range(1, 5):
+                ids.append(f"м{institute}о-{course}{number:02d}б-{25 - course}")
+        number += 1
+    return ids[:count]
+
+
+def synthetic_tree(group_ids):
+    """Институты и дерево групп для build_store из синтетических id"""
+    groups = {}
+    for group_id in group_ids:
+        institute, course = group_id[1:group_id.index("о")], group_id[group_id.index("-") + 1]
+        groups.setdefault(institute, {}).setdefault(course, []).append({"id": group_id, "name": group_id, "course": int(course)})
+    institutes = [{"id": institute, "name": f"Институт №{institute}"} for institute in groups]
+    return institutes, groups
+
+
+def without_compact(store: ScheduleStore) -> ScheduleStore:
+    """То же хранилище с пустым CompactSchedules - как было до него"""
+    return ScheduleStore(
+        store.index, CompactSchedules(), store.get_institutes(), store.groups, store.schedules,
+        version=store.version, epoch=store.epoch, built_at=store.built_at,
+    )
+
+
+def allocated(build) -> int:
+    """Сколько байт остается занято объектом, который вернул build()"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Память на хранение расписаний в разных представлениях")
+    parser.add_argument("--groups", type=int, default=1000)
+    args = parser.parse_args()
+
+    group_ids = synthetic_group_ids(args.groups)
+    schedules = [(group_id, get_schedule(group_id)) for group_id in group_ids]
+    encoded = [(group_id, dumps(schedule)) for group_id, schedule in schedules]
+
+    institutes, groups = synthetic_tree(group_ids)
+    bodies = dict(encoded)
+
+    def store():
+        return build_store(institutes, groups, lambda group_id: json.loads(bodies[group_id]), epoch="bench", built_at=0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store.snap")
+        write_snapshot(store(), path)
+        snapshot_size = os.path.getsize(path)
+        mapped = allocated(lambda: load_snapshot(path))
+
+    # Хранилище меряется целиком: CompactSchedules лежит в нем рядом с готовыми
+    # JSON-телами, а не вместо них, и собранное в процессе хранилище тяжелее варианта
+    # без compact на его размер. У загруженного из снимка тела и массив записей в общих
+    # страницах mmap; в куче воркера остаются таблицы строк, диапазоны и индексы
+    results = {
+        # Словари, как их возвращает get_schedule (копия через JSON, чтобы строки не делились с кодом)
+        "dicts": allocated(lambda: {group_id: json.loads(body) for group_id, body in encoded}),
+        "json_bytes": allocated(lambda: {group_id: dumps(json.loads(body)) for group_id, body in encoded}),
+        "compact": allocated(lambda: CompactSchedules.from_schedules(
+            (group_id, json.loads(body)) for group_id, body in encoded
+        )),
+        # Хранилище целиком: до CompactSchedules, с ним и загруженное из снимка (только куча)
+        "store_without_compact": allocated(lambda: without_compact(store())),
+        "store": allocated(store),
+        "store_snapshot_heap": mapped,
+        "store_snapshot_file": snapshot_size,
+    }
+    scale = 1000 / args.groups
+    for name, size in results.items():
+        print(json.dumps({"representation": name, "groups": args.groups, "kib_per_1000_groups": round(size * scale / 1024, 1)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import argparse
+import itertools
+import json
+import random
+from fastapi.encoders import jsonable_encoder
+from app.parser import DEFAULT_PARSER_BACKEND, parse_groups, parse_institutes, parse_schedule
+from app.responses import dumps
+from app.static_data import INSTITUTES, generate_groups_for_institute, get_schedule
+from app.store import build_store
+from .common import add_report_arguments, measure, print_table, report, summarize
+from .fixtures import load_fixture
+
+
+def cases(seed: int, parser_backend: str):
+    """Случаи микробенчмарков; порядок групп фиксирован seed, чтобы прогоны были сравнимы"""
+    store = build_store()
+    group_ids = store.group_ids()
+    random.Random(seed).shuffle(group_ids)
+    ids = itertools.cycle(group_ids)
+    institutes = itertools.cycle([institute["id"] for institute in INSTITUTES])
+    payloads = itertools.cycle([get_schedule(group_id) for group_id in group_ids])
+    html = {name: load_fixture(name) for name in ("institutes.html", "groups.html", "schedule.html")}
+
+    return {
+        "static_data.get_schedule": lambda: get_schedule(next(ids)),
+        "static_data.generate_groups_for_institute": lambda: generate_groups_for_institute(next(institutes)),
+        "store.get_schedule": lambda: store.get_schedule(next(ids)),
+        "encode: jsonable_encoder + json.dumps": lambda: json.dumps(jsonable_encoder(next(payloads))).encode("utf-8"),
+        "encode: responses.dumps": lambda: dumps(next(payloads)),
+        f"parse_institutes ({parser_backend})": lambda: parse_institutes(html["institutes.html"], parser_backend),
+        f"parse_groups ({parser_backend})": lambda: parse_groups(html["groups.html"], parser_backend),
+        f"parse_schedule ({parser_backend})": lambda: parse_schedule(html["schedule.html"], parser_backend),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки: данные, сериализация и разбор HTML")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--parser-backend", default=DEFAULT_PARSER_BACKEND)
+    add_report_arguments(parser)
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in cases(args.seed, args.parser_backend).items():
+        # Разбор HTML на порядки медленнее остального, ему хватит меньшего числа повторов
+        scale = 10 if name.startswith("parse_") else 1
+        measure(func, args.warmup // scale)
+        results[name] = summarize(measure(func, args.repeat // scale))
+    print_table(results)
+    params = {"repeat": args.repeat, "warmup": args.warmup, "seed": args.seed, "parser_backend": args.parser_backend}
+    report("micro", results, params, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import argparse
+from app.parser import PARSER_BACKENDS, parse_groups, parse_institutes, parse_schedule
+from .common import measure, print_table, summarize
+from .fixtures import load_fixture
+
+CASES = {
+    "institutes.html": parse_institutes,
+    "groups.html": parse_groups,
+    "schedule.html": parse_schedule,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение бэкендов разбора HTML на сохраненных фикстурах")
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    results = {}
+    for fixture, parse in CASES.items():
+        html = load_fixture(fixture)
+        expected = parse(html, "html.parser")
+        for backend in PARSER_BACKENDS:
+            # Любой бэкенд обязан давать тот же результат, что и html.parser
+            if parse(html, backend) != expected:
+                raise SystemExit(f"{backend}: результат для {fixture} отличается от html.parser")
+            results[f"{fixture} / {backend}"] = summarize(measure(lambda: parse(html, backend), args.repeat))
+    print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код «воркера»: импорт приложения, загрузка хранилища, чтение всех расписаний
+WORKER = r"""
+import json, sys, time
+started = time.perf_counter()
+from app.main import app
+from app.store import get_store
+imported = time.perf_counter()
+store = get_store()
+for group_id in store.group_ids():
+    store.get_schedule(group_id)
+finished = time.perf_counter()
+
+def memory():
+    result = {}
+    for path, keys in (("/proc/self/status", ("VmRSS",)), ("/proc/self/smaps_rollup", ("Pss",))):
+        try:
+            with open(path) as f:
+                for line in f:
+                    name, _, value = line.partition(":")
+                    if name in keys:
+                        result[name.lower() + "_kb"] = int(value.split()[0])
+        except OSError:
+            pass
+    return result
+
+print(json.dumps({
+    "startup_s": round(finished - started, 4),
+    "store_s": round(finished - imported, 4),
+    **memory(),
+}), flush=True)
+sys.stdin.read()
+"""
+
+
+def run_workers(count: int, env: dict) -> list:
+    """Запускает count воркеров одновременно и снимает их показатели, пока все живы"""
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER],
+            cwd=BACKEND_DIR,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(count)
+    ]
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.stdin.close()
+        process.wait()
+    return results
+
+
+def summarize(name: str, results: list) -> dict:
+    return {
+        "mode": name,
+        "workers": len(results),
+        "startup_s_max": max(r["startup_s"] for r in results),
+        "store_s_max": max(r["store_s"] for r in results),
+        "rss_kb_mean": sum(r.get("vmrss_kb", 0) for r in results) // len(results),
+        "pss_kb_total": sum(r.get("pss_kb", 0) for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время старта и память N воркеров: сборка хранилища против снимка")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from app.snapshot import write_snapshot
+    from app.store import build_store
+
+    env = {key: value for key, value in os.environ.items() if key != "SCHEDULE_SNAPSHOT"}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.snap")
+        write_snapshot(build_store(), path)
+        rows = [
+            summarize("build", run_workers(args.workers, env)),
+            summarize("snapshot", run_workers(args.workers, {**env, "SCHEDULE_SNAPSHOT": path})),
+        ]
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import itertools
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from app.static_data import get_schedule
+from app.store import build_store
+from .common import measure, print_table, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Задержка /api/schedule: генерация на лету против хранилища")
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    store = build_store()
+    ids = itertools.cycle(store.group_ids())
+
+    def before():
+        # Путь до хранилища: генерация словаря, jsonable_encoder и JSONResponse
+        JSONResponse(content=jsonable_encoder(get_schedule(next(ids))))
+
+    def after():
+        Response(content=store.get_schedule(next(ids)).body, media_type="application/json")
+
+    print_table({
+        "get_schedule + jsonable_encoder": summarize(measure(before, args.repeat)),
+        "ScheduleStore lookup": summarize(measure(after, args.repeat)),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Перцентиль по отсортированной выборке (ближайший ранг)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(func: Callable[[], object], repeat: int) -> List[float]:
+    """Время каждого вызова func в микросекундах"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return samples
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "p50_us": round(percentile(samples, 50), 2),
+        "p99_us": round(percentile(samples, 99), 2),
+        "mean_us": round(sum(samples) / len(samples), 2) if samples else 0.0,
+    }
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'case':<40}{'p50, мкс':>12}{'p99, мкс':>12}{'mean, мкс':>12}")
+    for name, row in results.items():
+        print(f"{name:<40}{row['p50_us']:>12}{row['p99_us']:>12}{row['mean_us']:>12}")
+
+
+def environment() -> Dict[str, object]:
+    """Условия прогона: без них результаты разных машин и коммитов сравнивать нельзя"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "revision": revision,
+        "timestamp": int(time.time()),
+    }
+
+
+def write_results(path: str, benchmark: str, results: Dict[str, Dict[str, float]], params: Dict) -> None:
+    """Результаты в JSON: имя набора, параметры, окружение и строки по случаям"""
+    payload = {"benchmark": benchmark, "params": params, "environment": environment(), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline_path: str,
+    tolerance: float,
+    lower_is_better: tuple = ("p99_us", "p99_ms"),
+    higher_is_better: tuple = ("rps",),
+) -> List[str]:
+    """Метрики, ухудшившиеся относительно сохраненного прогона больше чем на tolerance"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    found = []
+    for name, row in results.items():
+        previous: Optional[Dict[str, float]] = baseline.get(name)
+        if not previous:
+            continue
+        for key in lower_is_better:
+            if previous.get(key) and row.get(key, 0) > previous[key] * (1 + tolerance):
+                found.append(f"{name}: {key} {previous[key]} -> {row[key]}")
+        for key in higher_is_better:
+            if previous.get(key) and row.get(key, 0) < previous[key] * (1 - tolerance):
+                found.append(f"{name}: {key} {previous[key]} -> {row[key]}")
+    return found
+
+
+def report(benchmark: str, results: Dict[str, Dict[str, float]], params: Dict, args) -> None:
+    """Сохранение (--json) и сравнение с базовым прогоном (--baseline); при регрессии код выхода 1"""
+    if args.json:
+        write_results(args.json, benchmark, results, params)
+    if args.baseline:
+        found = regressions(results, args.baseline, args.tolerance)
+        for line in found:
+            print(f"РЕГРЕССИЯ {line}", file=sys.stderr)
+        if found:
+            raise SystemExit(1)
+
+
+def add_report_arguments(parser) -> None:
+    parser.add_argument("--json", metavar="PATH", help="записать результаты в JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое ухудшение (доля)")
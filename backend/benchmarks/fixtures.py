@@ -0,0 +1,79 @@
+import os
+from html import escape
+from typing import Dict, List, Optional
+from app.static_data import INSTITUTES, GROUPS, get_schedule
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Обвязка страниц сайта (меню, подвал), которую парсеру приходится пропускать
+CHROME = "".join(
+    f'<li class="menu-item"><a href="/section/{i}/">Раздел сайта №{i}</a><div class="submenu"><span>Подраздел {i}</span></div></li>'
+    for i in range(300)
+)
+PAGE = (
+    "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Расписание</title></head><body>"
+    "<header><ul class=\"menu\">" + CHROME + "</ul></header>"
+    "{nav}{body}"
+    "<footer><ul class=\"menu\">" + CHROME + "</ul></footer></body></html>"
+)
+
+
+def _select(name: str, options: List[Dict[str, str]]) -> str:
+    items = "".join(
+        f'<option value="{escape(option["id"])}">{escape(option["name"])}</option>'
+        for option in options
+    )
+    return f'<select name="{name}"><option value="">Выберите</option>{items}</select>'
+
+
+def render_institutes_page() -> str:
+    """Страница в разметке сайта МАИ со списком институтов"""
+    return PAGE.format(nav=_select("institute", INSTITUTES), body="")
+
+
+def render_groups_page(institute_id: str, course: Optional[str] = None) -> str:
+    """Страница со списком групп института (и курса)"""
+    courses = GROUPS.get(institute_id, {})
+    groups = []
+    for course_id, course_groups in courses.items():
+        if course is None or course == course_id:
+            groups.extend(course_groups)
+    return PAGE.format(nav=_select("institute", INSTITUTES) + _select("group", groups), body="")
+
+
+def render_schedule_page(group_id: str) -> str:
+    """Страница с таблицей расписания группы"""
+    rows = []
+    for day, lessons in get_schedule(group_id).items():
+        rows.append(f'<tr><th colspan="4">{day.capitalize()}</th></tr>')
+        for lesson in lessons:
+            rows.append(
+                "<tr>"
+                + "".join(f"<td>{escape(lesson[key])}</td>" for key in ("time", "name", "teacher", "room"))
+                + "</tr>"
+            )
+    table = f'<table class="schedule">{"".join(rows)}</table>'
+    return PAGE.format(nav=_select("institute", INSTITUTES), body=table)
+
+
+def load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def main():
+    """Пересохраняет фикстуры в benchmarks/fixtures"""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    pages = {
+        "institutes.html": render_institutes_page(),
+        "groups.html": render_groups_page("8"),
+        "schedule.html": render_schedule_page("м8о-102б-24"),
+    }
+    for name, html in pages.items():
+        with open(os.path.join(FIXTURES_DIR, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"{name}: {len(html)} символов")
+
+
+if __name__ == "__main__":
+    main()
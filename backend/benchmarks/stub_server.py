@@ -0,0 +1,69 @@
+import argparse
+import hashlib
+import multiprocessing
+import socket
+import time
+from aiohttp import web
+from .fixtures import render_groups_page, render_institutes_page, render_schedule_page
+
+
+async def handle(request: web.Request) -> web.Response:
+    """Отвечает как groups.php: без параметров, с institute[/course] или с group"""
+    query = request.rel_url.query
+    if "group" in query:
+        html = render_schedule_page(query["group"])
+    elif "institute" in query:
+        html = render_groups_page(query["institute"], query.get("course"))
+    else:
+        html = render_institutes_page()
+    # ETag, как у настоящего сервера, чтобы проверять условные запросы
+    etag = '"' + hashlib.sha1(html.encode("utf-8")).hexdigest() + '"'
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers={"ETag": etag})
+    return web.Response(text=html, content_type="text/html", headers={"ETag": etag})
+
+
+def make_app() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/education/studies/schedule/groups.php", handle)
+    return app
+
+
+async def start(host: str = "127.0.0.1", port: int = 0):
+    """Запускает заглушку и возвращает (runner, base_url)"""
+    runner = web.AppRunner(make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/education/studies/schedule/groups.php"
+
+
+def _serve_forever(host: str, port: int):
+    web.run_app(make_app(), host=host, port=port, print=None, access_log=None)
+
+
+def start_process(host: str = "127.0.0.1", port: int = 8081):
+    """Заглушка в отдельном процессе, чтобы не делить с обходчиком одно ядро"""
+    process = multiprocessing.Process(target=_serve_forever, args=(host, port), daemon=True)
+    process.start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return process, f"http://{host}:{port}/education/studies/schedule/groups.php"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка сайта расписания МАИ")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    web.run_app(make_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# Корень backend в sys.path: тесты импортируют app и benchmarks так же, как run.py,
+# и запускаются обычным pytest из корня репозитория или из backend
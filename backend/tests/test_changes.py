@@ -0,0 +1,114 @@
+import json
+import pytest
+from app.changes import ChangeLog, parse_token
+from app.store import build_store
+
+INSTITUTES = [{"id": "1", "name": "Институт №1"}]
+GROUPS = {"1": {"1": [{"id": "g1", "name": "g1", "course": 1}, {"id": "g2", "name": "g2", "course": 1}]}}
+
+
+def _store(version: int, room: str, epoch: str = "e1"):
+    """Хранилище из двух групп; у g1 меняется аудитория первого занятия"""
+    def schedule(group_id):
+        lessons = [
+            {"time": "9:00 - 10:30", "name": "Физика", "teacher": "Механиков М.М.", "room": room if group_id == "g1" else "А-1"},
+            {"time": "10:45 - 12:15", "name": "Химия", "teacher": "Реактивов Р.Р.", "room": "Б-2"},
+        ]
+        return {"monday": lessons}
+
+    return build_store(INSTITUTES, GROUPS, schedule, version=version, epoch=epoch, built_at=0)
+
+
+def _chain(log: ChangeLog, count: int, epoch: str = "e1"):
+    """count хранилищ подряд с записью каждой подмены в журнал"""
+    stores = [_store(1, "room-1", epoch)]
+    for version in range(2, count + 1):
+        stores.append(_store(version, f"room-{version}", epoch))
+        log.record(stores[-2], stores[-1])
+    return stores
+
+
+def _since(log: ChangeLog, store, group_id: str, token: str):
+    return json.loads(log.since(store, group_id, token).body)
+
+
+@pytest.mark.parametrize("token, expected", [
+    ("e1.3", ("e1", 3)),
+    ("6ad4b9f0-042a91a5.12", ("6ad4b9f0-042a91a5", 12)),
+    ("a.b.7", ("a.b", 7)),
+    ("", None),
+    ("5", None),
+    ("e1.", None),
+    (".3", None),
+    ("e1.x", None),
+    ("e1.-1", None),
+])
+def test_parse_token(token, expected):
+    assert parse_token(token) == expected
+
+
+def test_since_current_version_is_empty():
+    log = ChangeLog()
+    stores = _chain(log, 3)
+    assert _since(log, stores[-1], "g1", stores[-1].token) == {"version": "e1.3", "since": "e1.3", "changes": []}
+
+
+def test_since_older_version_returns_deltas_in_order():
+    log = ChangeLog()
+    stores = _chain(log, 3)
+    body = _since(log, stores[-1], "g1", stores[0].token)
+
+    assert (body["version"], body["since"]) == ("e1.3", "e1.1")
+    assert [change["version"] for change in body["changes"]] == ["e1.2", "e1.3"]
+    assert [change["changed"][0]["was"] for change in body["changes"]] == [{"room": "room-1"}, {"room": "room-2"}]
+    # У g2 ничего не менялось
+    assert _since(log, stores[-1], "g2", stores[0].token)["changes"] == []
+
+
+def test_window_is_trimmed_to_max_versions():
+    log = ChangeLog(max_versions=2)
+    stores = _chain(log, 5)
+    assert log.stats()["versions"] == 2
+
+    # Журнал помнит подмены 3→4 и 4→5: с версии 3 догнать можно, с более ранних - нет
+    assert len(_since(log, stores[-1], "g1", "e1.3")["changes"]) == 2
+    for token in ("e1.2", "e1.1"):
+        assert _since(log, stores[-1], "g1", token)["full"] is True
+
+
+@pytest.mark.parametrize("token", ["junk", "e1.99", "other.1", "other.3", "e1.0"])
+def test_unknown_tokens_get_full_schedule(token):
+    log = ChangeLog()
+    stores = _chain(log, 3)
+    body = _since(log, stores[-1], "g1", token)
+
+    assert body["version"] == "e1.3"
+    assert body["full"] is True
+    assert body["schedule"]["monday"][0]["room"] == "room-3"
+
+
+def test_new_epoch_restarts_log():
+    log = ChangeLog()
+    old = _chain(log, 3)
+    crawled = _store(1, "room-new", epoch="e2")
+    log.record(old[-1], crawled)
+
+    # Номер 1 старой эпохи - не та же версия, что e2.1
+    assert _since(log, crawled, "g1", "e1.1")["full"] is True
+    assert _since(log, crawled, "g1", "e1.3")["full"] is True
+    assert _since(log, crawled, "g1", "e2.1")["changes"] == []
+
+    following = _store(2, "room-next", epoch="e2")
+    log.record(crawled, following)
+    body = _since(log, following, "g1", "e2.1")
+    assert [change["version"] for change in body["changes"]] == ["e2.2"]
+
+
+def test_log_ahead_of_store_is_not_used():
+    log = ChangeLog()
+    stores = _chain(log, 2)
+    # Журнал уже записал подмену в новую эпоху, а хранилище еще старое
+    log.record(stores[-1], _store(1, "room-x", epoch="e2"))
+
+    assert _since(log, stores[-1], "g1", "e1.2")["changes"] == []
+    assert _since(log, stores[-1], "g1", "e1.1")["full"] is True
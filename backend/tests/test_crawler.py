@@ -0,0 +1,117 @@
+import asyncio
+from aiohttp import web
+from app.crawler import crawl
+from app.parser import FetchError, MAIParser
+from app.static_data import GROUPS, INSTITUTES, get_schedule
+from benchmarks import stub_server
+
+# Короткая пауза между повторами, чтобы тесты не ждали секундами
+BACKOFF = 0.01
+
+
+async def _serve(app=None):
+    """Заглушка сайта (или переданное приложение) на свободном порту: (runner, base_url)"""
+    if app is None:
+        return await stub_server.start()
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/education/studies/schedule/groups.php"
+
+
+async def _crawl_stub(app=None, courses=(1, 2, 3, 4), **parser_options):
+    """Обход через настоящий HTTP"""
+    runner, base_url = await _serve(app)
+    try:
+        async with MAIParser(base_url=base_url, backoff=BACKOFF, **parser_options) as parser:
+            result = await crawl(parser, courses=courses)
+        return result, parser.stats
+    finally:
+        await runner.cleanup()
+
+
+def _flaky_app(failures: int, status: int = 503):
+    """Заглушка, где страница первой группы первые failures раз отвечает ошибкой"""
+    target = GROUPS["1"]["1"][0]["id"]
+    attempts = {"count": 0}
+
+    async def handle(request: web.Request) -> web.Response:
+        if request.rel_url.query.get("group") == target and attempts["count"] < failures:
+            attempts["count"] += 1
+            return web.Response(status=status)
+        return await stub_server.handle(request)
+
+    app = web.Application()
+    app.router.add_get("/education/studies/schedule/groups.php", handle)
+    return app, target, attempts
+
+
+def test_crawl_matches_static_data():
+    result, stats = asyncio.run(_crawl_stub())
+
+    assert result.institutes == INSTITUTES
+    assert result.groups == {
+        institute_id: {course: groups for course, groups in courses.items() if groups}
+        for institute_id, courses in GROUPS.items()
+    }
+    group_ids = [group["id"] for courses in GROUPS.values() for groups in courses.values() for group in groups]
+    assert set(result.schedules) == set(group_ids)
+    for group_id in group_ids[:20]:
+        assert result.schedules[group_id] == get_schedule(group_id)
+    assert result.failed == {}
+    assert not stats.failures
+    assert stats.retries == 0
+    assert stats.pages == 1 + len(INSTITUTES) * 4 + len(group_ids)
+
+
+def test_crawl_retries_transient_errors():
+    app, target, attempts = _flaky_app(failures=2)
+    result, stats = asyncio.run(_crawl_stub(app, courses=(1,), retries=3))
+
+    assert attempts["count"] == 2
+    assert stats.retries == 2
+    # Повтор удался: ошибка не засчитана, расписание на месте
+    assert not stats.failures
+    assert result.failed == {}
+    assert result.schedules[target] == get_schedule(target)
+
+
+def test_crawl_counts_exhausted_retries():
+    app, target, attempts = _flaky_app(failures=100)
+    result, stats = asyncio.run(_crawl_stub(app, courses=(1,), retries=2))
+
+    assert attempts["count"] == 3
+    assert stats.retries == 2
+    assert stats.failures == {"http_503": 1}
+    assert result.failed == {target: "http_503"}
+    assert target not in result.schedules
+
+
+def test_crawl_does_not_retry_client_errors():
+    app, target, attempts = _flaky_app(failures=100, status=404)
+    result, stats = asyncio.run(_crawl_stub(app, courses=(1,), retries=3))
+
+    assert attempts["count"] == 1
+    assert stats.retries == 0
+    assert stats.failures == {"http_404": 1}
+    assert result.failed == {target: "http_404"}
+
+
+def test_get_schedule_raises_fetch_error():
+    async def run():
+        app, target, _ = _flaky_app(failures=100)
+        runner, base_url = await _serve(app)
+        try:
+            async with MAIParser(base_url=base_url, retries=1, backoff=BACKOFF) as parser:
+                try:
+                    await parser.get_schedule(target)
+                except FetchError as e:
+                    return e
+        finally:
+            await runner.cleanup()
+
+    error = asyncio.run(run())
+    assert isinstance(error, FetchError)
+    assert error.kind == "http_503"
@@ -0,0 +1,20 @@
+import json
+from app.lookup import ReverseIndex
+
+SCHEDULES = [
+    ("g1", {"thursday": [{"time": "9:00 - 10:30", "name": "Физика (лабораторная)", "teacher": "Механиков М.М.", "room": "Б-331", "week": "odd"}]}),
+    ("g2", {"thursday": [{"time": "9:00 - 10:30", "name": "Химия (лабораторная)", "teacher": "Реактивов Р.Р.", "room": "Б-332", "week": "even"}]}),
+    ("g3", {"thursday": [{"time": "9:00 - 10:30", "name": "Физика (лекция)", "teacher": "Механиков М.М.", "room": "А-510"}]}),
+]
+
+
+def test_free_rooms_follow_week_parity():
+    lookup = ReverseIndex(SCHEDULES)
+
+    def free(parity):
+        return json.loads(lookup.free_rooms("thursday", "9:00 - 10:30", parity).body)
+
+    # Аудитория, занятая только по нечетным неделям, свободна по четным, и наоборот
+    assert free("odd") == ["Б-332"]
+    assert free("even") == ["Б-331"]
+    assert json.loads(lookup.free_rooms("friday", "9:00 - 10:30", "odd").body) == ["А-510", "Б-331", "Б-332"]
@@ -0,0 +1,106 @@
+import asyncio
+import os
+from aiohttp import web
+from app.refresh import ScheduleRefresher, SnapshotWatcher
+from app.snapshot import load_snapshot
+from app.static_data import GROUPS
+from benchmarks import stub_server
+
+# Короткая пауза между повторами, чтобы тесты не ждали секундами
+BACKOFF = 0.01
+
+
+def _failing_app(broken):
+    """Заглушка сайта, где страницы с параметрами из broken всегда отвечают 503"""
+    async def handle(request: web.Request) -> web.Response:
+        query = dict(request.rel_url.query)
+        if any(all(query.get(name) == value for name, value in params.items()) for params in broken):
+            return web.Response(status=503)
+        return await stub_server.handle(request)
+
+    app = web.Application()
+    app.router.add_get("/education/studies/schedule/groups.php", handle)
+    return app
+
+
+async def _refresh(tmp_path, app=None):
+    """Один обход в снимок tmp_path/store.snap; (записан ли снимок, ошибка)"""
+    runner = web.AppRunner(app or stub_server.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}/education/studies/schedule/groups.php"
+    refresher = ScheduleRefresher(base_url, str(tmp_path / "store.snap"), state_path=str(tmp_path / "state.json"), retries=1, backoff=BACKOFF)
+    try:
+        return await refresher.refresh_once(), None
+    except RuntimeError as e:
+        return False, e
+    finally:
+        await runner.cleanup()
+
+
+def _all_group_ids():
+    return {group["id"] for courses in GROUPS.values() for groups in courses.values() for group in groups}
+
+
+def test_failed_group_list_without_crawled_data_fails(tmp_path):
+    written, error = asyncio.run(_refresh(tmp_path, _failing_app([{"institute": "1", "course": "1"}])))
+
+    # Прежние данные статические: опубликовать урезанное дерево нельзя
+    assert not written
+    assert "groups:1:1" in str(error)
+    assert not os.path.exists(tmp_path / "store.snap")
+
+
+def test_failed_group_list_keeps_previous_course(tmp_path):
+    assert asyncio.run(_refresh(tmp_path)) == (True, None)
+    first = load_snapshot(str(tmp_path / "store.snap"))
+
+    # Без валидаторов второй обход полный, но страница курса не загрузилась:
+    # курс и его расписания берутся из прежнего снимка
+    os.remove(tmp_path / "state.json")
+    assert asyncio.run(_refresh(tmp_path, _failing_app([{"institute": "1", "course": "1"}]))) == (True, None)
+    store = load_snapshot(str(tmp_path / "store.snap"))
+
+    assert (store.epoch, store.version) == (first.epoch, first.version + 1)
+    assert set(store.group_ids()) == _all_group_ids()
+    assert store.index.tree == first.index.tree
+    for group in GROUPS["1"]["1"]:
+        assert store.get_schedule(group["id"]).body == first.get_schedule(group["id"]).body
+
+
+def test_failed_schedule_is_not_filled_from_static_data(tmp_path):
+    target = GROUPS["1"]["1"][0]["id"]
+    written, error = asyncio.run(_refresh(tmp_path, _failing_app([{"group": target}])))
+
+    assert not written
+    assert target in str(error)
+    assert not os.path.exists(tmp_path / "store.snap")
+
+
+def test_crawler_stats_reach_workers(tmp_path):
+    path = str(tmp_path / "store.snap")
+
+    async def run():
+        runner = web.AppRunner(stub_server.make_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        refresher = ScheduleRefresher(f"http://127.0.0.1:{port}/education/studies/schedule/groups.php", path, state_path=None, retries=0)
+        try:
+            assert await refresher.refresh_and_report()
+        finally:
+            await runner.cleanup()
+        # Сайт пропал: неудачный обход тоже учитывается
+        assert not await refresher.refresh_and_report()
+        watcher = SnapshotWatcher(path)
+        assert await watcher.check_once()
+        return watcher.crawler
+
+    stats = asyncio.run(run())
+    assert (stats["refreshes"], stats["failures"]) == (1, 1)
+    assert stats["last_success"] is not None
+    assert "connection" in stats["last_error"]
+    assert stats["fetch"]["failures"] == {"connection": 1}
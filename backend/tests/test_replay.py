@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from app.crawler import crawl
+from app.parser import FetchError, MAIParser
+from app.static_data import GROUPS, INSTITUTES, get_schedule
+from app.transport import Corpus, Faults, ReplayTransport, record_crawl
+from benchmarks import stub_server
+
+# Короткая пауза между повторами, чтобы тесты не ждали секундами
+BACKOFF = 0.01
+# Виды ошибок Faults так, как их считает FetchStats
+FAULT_KINDS = {"http_503", "timeout", "connection"}
+
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    """Корпус, записанный с заглушки сайта и прочитанный обратно с диска"""
+    path = str(tmp_path_factory.mktemp("corpus") / "stub.jsonl.gz")
+
+    async def record():
+        runner, base_url = await stub_server.start()
+        try:
+            await record_crawl(base_url, path, backoff=BACKOFF)
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(record())
+    return Corpus.load(path)
+
+
+async def _replay(corpus, faults=None, courses=(1, 2, 3, 4), **parser_options):
+    async with MAIParser(base_url=corpus.base_url, backoff=BACKOFF, transport=ReplayTransport(corpus, faults), **parser_options) as parser:
+        result = await crawl(parser, courses=courses)
+    return result, parser.stats
+
+
+def test_faults_sequence_is_seeded():
+    first, second = Faults(error_rate=0.5, seed=7), Faults(error_rate=0.5, seed=7)
+    sequence = [first.error() for _ in range(50)]
+    assert sequence == [second.error() for _ in range(50)]
+    assert set(sequence) - {None} <= {"status", "timeout", "connection"}
+    assert None in sequence
+    assert all(Faults(seed=7).error() is None for _ in range(50))
+
+
+def test_replay_matches_static_data(corpus):
+    result, stats = asyncio.run(_replay(corpus))
+
+    assert result.institutes == INSTITUTES
+    group_ids = [group["id"] for courses in GROUPS.values() for groups in courses.values() for group in groups]
+    assert set(result.schedules) == set(group_ids)
+    for group_id in group_ids[:20]:
+        assert result.schedules[group_id] == get_schedule(group_id)
+    assert result.failed == {}
+    assert not stats.failures
+    assert stats.pages == len(corpus)
+
+
+def test_replay_retries_injected_errors(corpus):
+    result, stats = asyncio.run(_replay(corpus, Faults(error_rate=0.1, seed=1), courses=(1,), retries=5))
+
+    # Ошибки были, но все пережиты повторами
+    assert stats.retries > 0
+    assert not stats.failures
+    assert result.failed == {}
+    assert result.schedules
+
+
+def test_replay_counts_failures(corpus):
+    async def run():
+        async with MAIParser(base_url=corpus.base_url, retries=2, backoff=BACKOFF, transport=ReplayTransport(corpus, Faults(error_rate=1.0))) as parser:
+            with pytest.raises(FetchError) as error:
+                await parser.get_schedule(GROUPS["1"]["1"][0]["id"])
+        return error.value, parser.stats
+
+    error, stats = asyncio.run(run())
+    assert error.kind in FAULT_KINDS
+    assert stats.retries == 2
+    assert dict(stats.failures) == {error.kind: 1}
+    assert stats.pages == 0
+
+
+def test_replay_crawl_with_all_requests_failing(corpus):
+    async def run():
+        async with MAIParser(base_url=corpus.base_url, retries=1, backoff=BACKOFF, transport=ReplayTransport(corpus, Faults(error_rate=1.0))) as parser:
+            with pytest.raises(FetchError):
+                await crawl(parser)
+        return parser.stats
+
+    stats = asyncio.run(run())
+    # Без списка институтов обход дальше не идет: одна страница, одна ошибка
+    assert stats.retries == 1
+    assert sum(stats.failures.values()) == 1
+    assert set(stats.failures) <= FAULT_KINDS
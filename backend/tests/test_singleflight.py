@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+from app import singleflight
+from app.singleflight import SingleFlight, StaleWhileRevalidate
+
+
+def test_concurrent_calls_share_one_load():
+    async def run():
+        flight = SingleFlight()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        results = await asyncio.gather(*(flight.do("k", loader) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(run())
+    assert results == [1] * 5
+    assert len(calls) == 1
+    assert stats == {"calls": 5, "executions": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_cancelling_first_caller_keeps_others_waiting():
+    async def run():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+            return "value"
+
+        leader = asyncio.create_task(flight.do("k", loader))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leader, await follower, flight.stats()
+
+    leader, value, stats = asyncio.run(run())
+    assert leader.cancelled()
+    assert value == "value"
+    assert stats["executions"] == 1
+    assert stats["in_flight"] == 0
+
+
+def test_cancelling_every_caller_lets_load_finish():
+    async def run():
+        flight = SingleFlight()
+        finished = asyncio.Event()
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            finished.set()
+            return "value"
+
+        caller = asyncio.create_task(flight.do("k", loader))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.wait_for(finished.wait(), 1)
+        await asyncio.sleep(0)
+        return flight.in_flight("k")
+
+    assert asyncio.run(run()) is False
+
+
+def test_error_reaches_every_caller():
+    async def run():
+        flight = SingleFlight()
+
+        async def loader():
+            await asyncio.sleep(0.01)
+            raise LookupError("нет группы")
+
+        return await asyncio.gather(*(flight.do("k", loader) for _ in range(3)), return_exceptions=True), flight.stats()
+
+    results, stats = asyncio.run(run())
+    assert all(isinstance(result, LookupError) for result in results)
+    assert stats["in_flight"] == 0
+
+
+def test_seeded_value_is_stale_and_replaced(monkeypatch):
+    # Хост только что загрузился: monotonic меньше срока свежести
+    monkeypatch.setattr(singleflight, "time", SimpleNamespace(monotonic=lambda: 5.0))
+
+    async def run():
+        cache = StaleWhileRevalidate(ttl=60)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return "live"
+
+        cache.seed("k", "old")
+        cache.seed("k", "swapped")
+        first = await cache.get("k", loader)
+        # Фоновое обновление
+        await asyncio.sleep(0)
+        while cache.flight.in_flight("k"):
+            await asyncio.sleep(0)
+        # Загруженное значение начальным не перетирается
+        cache.seed("k", "newer-store")
+        second = await cache.get("k", loader)
+        return first, second, loads, cache.stats()
+
+    first, second, loads, stats = asyncio.run(run())
+    assert first == "swapped"
+    assert second == "live"
+    assert len(loads) == 1
+    assert (stats["stale_hits"], stats["hits"]) == (1, 1)
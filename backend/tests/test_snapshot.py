@@ -0,0 +1,69 @@
+import pytest
+from app.snapshot import MAGIC, load_snapshot, write_snapshot
+from app.store import build_store
+
+
+@pytest.fixture(scope="module")
+def store():
+    return build_store(version=3, epoch="e1", built_at=1700000000)
+
+
+@pytest.fixture
+def path(tmp_path, store):
+    path = str(tmp_path / "store.snap")
+    write_snapshot(store, path)
+    return path
+
+
+def test_round_trip(store, path):
+    loaded = load_snapshot(path)
+
+    assert (loaded.version, loaded.epoch, loaded.built_at, loaded.token) == (3, "e1", 1700000000, "e1.3")
+    assert loaded.get_institutes() == store.get_institutes()
+    assert dict(loaded.groups) == dict(store.groups)
+    assert loaded.group_ids() == store.group_ids()
+    for group_id in store.group_ids():
+        assert loaded.get_schedule(group_id) == store.get_schedule(group_id)
+        assert loaded.compact.expand(group_id) == store.compact.expand(group_id)
+    assert loaded.index.tree == store.index.tree
+    assert loaded.lookup.times == store.lookup.times
+    teacher = store.compact.tables["teacher"].strings[0]
+    assert loaded.lookup.teacher(teacher) == store.lookup.teacher(teacher)
+
+
+def test_records_are_viewed_through_mmap(path):
+    records = load_snapshot(path).compact.records
+    # Без копии: записи - представление отображенного файла, только для чтения
+    assert isinstance(records, memoryview)
+    assert records.readonly
+
+
+def test_rewrite_is_atomic(store, path, tmp_path):
+    loaded = load_snapshot(path)
+    write_snapshot(build_store(version=4, epoch="e1", built_at=1700000001), path)
+
+    # Открытый снимок продолжает читать свою копию файла
+    group_id = store.group_ids()[0]
+    assert loaded.get_schedule(group_id) == store.get_schedule(group_id)
+    assert load_snapshot(path).version == 4
+    assert not (tmp_path / "store.snap.tmp").exists()
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: b"",
+    lambda data: data[:4],
+    lambda data: b"NOTASNAP" + data[len(MAGIC):],
+    lambda data: data[:len(MAGIC) + 10],
+    lambda data: data[:len(data) // 2],
+    lambda data: data[:-1],
+    lambda data: data + b"\0",
+    lambda data: data[:len(MAGIC)] + b"\xff\xff\xff\x7f" + data[len(MAGIC) + 4:],
+], ids=["empty", "shorter-than-magic", "wrong-magic", "cut-header", "cut-data", "missing-byte", "extra-byte", "bad-length"])
+def test_damaged_file_is_rejected(path, damage):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(damage(data))
+
+    with pytest.raises(ValueError):
+        load_snapshot(path)
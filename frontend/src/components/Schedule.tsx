@@ -117,6 +117,12 @@ const LessonRoom = styled.span`
   margin-left: 1rem;
 `;
 
+const LessonWeek = styled.span`
+  color: rgba(255, 255, 255, 0.7);
+  font-style: italic;
+  margin-left: 1rem;
+`;
+
 const ErrorMessage = styled.div`
   color: #ff6b6b;
   text-align: center;
@@ -140,6 +146,12 @@ const dayMapping: { [key: string]: string } = {
   sunday: "Воскресенье",
 };
 
+// Занятия только по нечетным или четным неделям подписываются, чтобы не выглядеть накладкой
+const weekMapping: { [key: string]: string } = {
+  odd: "нечетная неделя",
+  even: "четная неделя",
+};
+
 const Schedule: React.FC<ScheduleProps> = ({ institute, course, group }) => {
   const [currentDate, setCurrentDate] = useState(new Date());
   const [selectedDate, setSelectedDate] = useState(new Date());
@@ -234,6 +246,7 @@ const Schedule: React.FC<ScheduleProps> = ({ institute, course, group }) => {
                 <LessonTime>{lesson.time}</LessonTime>
                 <LessonName>{lesson.name}</LessonName>
                 <LessonRoom>{lesson.room}</LessonRoom>
+                {lesson.week && <LessonWeek>{weekMapping[lesson.week]}</LessonWeek>}
               </LessonInfo>
             </Lesson>
           ))
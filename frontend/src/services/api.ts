@@ -11,11 +11,18 @@ export interface Group {
   course: number;
 }
 
+export type WeekParity = "odd" | "even";
+
 export interface Lesson {
   time: string;
   name: string;
   teacher: string;
   room: string;
+  // Только по нечетным или четным неделям; если не задано - каждую неделю
+  week?: WeekParity;
+  // Границы дат (ISO), например для разовых занятий
+  date_from?: string;
+  date_to?: string;
 }
 
 export interface Schedule {
@@ -28,6 +35,44 @@ export interface Schedule {
   sunday: Lesson[];
 }
 
+export interface DayView {
+  date: string;
+  weekday: keyof Schedule;
+  week: number;
+  parity: WeekParity;
+  lessons: Lesson[];
+}
+
+export interface GroupSearchResult extends Group {
+  institute: string;
+}
+
+export interface ScheduleBatchItem {
+  id: string;
+  schedule?: Schedule;
+  error?: string;
+}
+
+export interface DayLesson extends Lesson {
+  day: keyof Schedule;
+}
+
+// Версия данных «эпоха.номер»: сравнивать можно только на равенство
+export type DataVersion = string;
+
+export interface ScheduleChange {
+  version: DataVersion;
+  added?: DayLesson[];
+  removed?: DayLesson[];
+  // Занятие в том же слоте, у которого поменялись поля; в was - прежние значения
+  changed?: (Partial<DayLesson> & { day: keyof Schedule; time: string; was: Partial<Lesson> })[];
+}
+
+// Либо изменения после since, либо все расписание, если клиент отстал слишком сильно
+export type ScheduleChanges =
+  | { version: DataVersion; since: DataVersion; changes: ScheduleChange[] }
+  | { version: DataVersion; full: true; schedule: Schedule };
+
 export const api = {
   async getInstitutes(): Promise<Institute[]> {
     const response = await fetch(`${API_BASE_URL}/institutes`);
@@ -56,4 +101,94 @@ export const api = {
     }
     return response.json();
   },
+
+  async getToday(groupId: string): Promise<DayView> {
+    const response = await fetch(`${API_BASE_URL}/schedule/${groupId}/today`);
+    if (!response.ok) {
+      throw new Error("Failed to fetch today's schedule");
+    }
+    return response.json();
+  },
+
+  async getWeek(groupId: string, week: number): Promise<DayView[]> {
+    const response = await fetch(
+      `${API_BASE_URL}/schedule/${groupId}/week/${week}`
+    );
+    if (!response.ok) {
+      throw new Error("Failed to fetch week schedule");
+    }
+    return response.json();
+  },
+
+  async searchGroups(query: string, limit = 10): Promise<GroupSearchResult[]> {
+    const url = new URL(`${API_BASE_URL}/search`);
+    url.searchParams.append("q", query);
+    url.searchParams.append("limit", limit.toString());
+    const response = await fetch(url.toString());
+    if (!response.ok) {
+      throw new Error("Failed to search groups");
+    }
+    return response.json();
+  },
+
+  async getSchedules(
+    groupIds: string[],
+    instituteId?: string
+  ): Promise<ScheduleBatchItem[]> {
+    const response = await fetch(`${API_BASE_URL}/schedules`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ groups: groupIds, institute: instituteId }),
+    });
+    if (!response.ok) {
+      throw new Error("Failed to fetch schedules");
+    }
+    // Ответ в NDJSON: одна строка на группу
+    const text = await response.text();
+    return text
+      .split("\n")
+      .filter((line) => line)
+      .map((line) => JSON.parse(line));
+  },
+
+  async getScheduleChanges(groupId: string, since: DataVersion): Promise<ScheduleChanges> {
+    const response = await fetch(
+      `${API_BASE_URL}/schedule/${groupId}/changes?since=${encodeURIComponent(since)}`
+    );
+    if (!response.ok) {
+      throw new Error("Failed to fetch schedule changes");
+    }
+    return response.json();
+  },
+
+  // Поток изменений по SSE; EventSource сам переподключается и передает Last-Event-ID.
+  // change === null: изменение слишком большое или клиент отстал, расписание нужно запросить
+  // заново (getSchedule); в catchup с full оно приходит сразу в schedule.
+  subscribeChanges(
+    groupIds: string[],
+    onChange: (groupId: string, change: ScheduleChange | null, schedule?: Schedule) => void
+  ): EventSource {
+    const source = new EventSource(
+      `${API_BASE_URL}/events?groups=${encodeURIComponent(groupIds.join(","))}`
+    );
+    source.addEventListener("changes", (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      onChange(data.group, data.full ? null : data.change);
+    });
+    // После переподключения: все, что пропущено с Last-Event-ID, по каждой группе
+    source.addEventListener("catchup", (event) => {
+      const data: { group: string; changes: ScheduleChanges } = JSON.parse(
+        (event as MessageEvent).data
+      );
+      if ("full" in data.changes) {
+        onChange(data.group, null, data.changes.schedule);
+      } else {
+        data.changes.changes.forEach((change) => onChange(data.group, change));
+      }
+    });
+    // Событие dropped (медленный клиент отключен) отдельно не обрабатывается: сервер
+    // закрывает поток, EventSource переподключается с Last-Event-ID, и пропущенное
+    // приходит в catchup
+    return source;
+  },
 };